@@ -1,6 +1,6 @@
 from ast import AST, USub
 import ast
-from queue import LifoQueue
+from stack import Stack
 from symbol import Action
 from tokens import Token
 from typing import Literal, Tuple, List
@@ -19,12 +19,12 @@ class StoreToBody(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue,
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack,
+        TokenStack: Stack[Token],
     ):
         """Modify parent node by appending child value to its body.
 
-        :param ValueStack: LIFO queue containing AST nodes in order:
+        :param ValueStack: LIFO stack containing AST nodes in order:
 
             - Top: Value to append (function, class, statement)
             - Next: Parent node with body attribute (module, function, etc)
@@ -33,11 +33,8 @@ class StoreToBody(Action):
 
         .. note:: Parent node must have a `body` attribute (like :class:`ast.Module`)
         """
-        value = ValueStack.get()
-        module = ValueStack.get()
-
-        module.body.append(value)
-        ValueStack.put(module)
+        value = ValueStack.pop()
+        ValueStack.peek().body.append(value)
 
 
 class StoreToElse(Action):
@@ -62,12 +59,12 @@ class StoreToElse(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
         """Process else clause body and modify AST structure accordingly.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: Else clause body statements
             - Next: Either:
                 a) ast.If node (direct else attachment), or
@@ -95,8 +92,8 @@ class StoreToElse(Action):
                 ]
             )
         """
-        value = ValueStack.get()
-        if_node_or_expr = ValueStack.get()
+        value = ValueStack.pop()
+        if_node_or_expr = ValueStack.pop()
 
         if isinstance(if_node_or_expr, ast.If):
             if_node = if_node_or_expr
@@ -105,17 +102,17 @@ class StoreToElse(Action):
                 current = current.orelse[0]
 
             current.orelse.append(value)
-            ValueStack.put(if_node)
+            ValueStack.push(if_node)
         else:
-            if_node = ValueStack.get()
+            if_node = ValueStack.pop()
             expr = if_node_or_expr
 
             current = if_node
             while current.orelse and isinstance(current.orelse[0], ast.If):
                 current = current.orelse[0]
             current.body.append(value)
-            ValueStack.put(if_node)
-            ValueStack.put(expr)
+            ValueStack.push(if_node)
+            ValueStack.push(expr)
 
 
 class StoreLiteral(Action):
@@ -140,16 +137,16 @@ class StoreLiteral(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
         """Process the literal token and push converted value to ValueStack.
 
-        :param ValueStack: LIFO queue holding AST nodes during parsing
-        :param TokenStack: LIFO queue containing lexed tokens
+        :param ValueStack: LIFO stack holding AST nodes during parsing
+        :param TokenStack: LIFO stack containing lexed tokens
         :raises ValueError: If conversion from lexeme to specified type fails
         """
-        literal = TokenStack.get()
+        literal = TokenStack.pop()
 
         try:
             converted_value = self.type(literal.lexeme)
@@ -163,8 +160,8 @@ class StoreLiteral(Action):
             raise
 
         node = ast.Constant(value=converted_value)
-        logger.info(f"Storing {self.type.__name__} literal: {converted_value}")
-        ValueStack.put(node)
+        logger.debug("Storing %s literal: %s", self.type.__name__, converted_value)
+        ValueStack.push(node)
 
 
 class AssignToVariable(Action):
@@ -177,12 +174,12 @@ class AssignToVariable(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
         """Create and push an assignment node to the ValueStack.
 
-        :param ValueStack: LIFO queue containing AST elements in reverse order:
+        :param ValueStack: LIFO stack containing AST elements in reverse order:
 
             - Top: Value to be assigned
             - Next: Target Name node for storage
@@ -190,12 +187,10 @@ class AssignToVariable(Action):
         :param TokenStack: Not used in this action (maintained for interface consistency)
         :returns: None (pushes assignment node to ValueStack)
         """
-        value = ValueStack.get()
-        name = ValueStack.get()
-        print(value, name)
+        name, value = ValueStack.pop_n(2)
 
         node = ast.Assign(targets=[name], value=value)
-        ValueStack.put(node)
+        ValueStack.push(node)
 
 
 class StoreVariableName(Action):
@@ -207,20 +202,20 @@ class StoreVariableName(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
         """Process variable name token and create storage-context Name node.
 
-        :param ValueStack: LIFO queue where the created Name node will be pushed
-        :param TokenStack: LIFO queue containing identifier tokens
+        :param ValueStack: LIFO stack where the created Name node will be pushed
+        :param TokenStack: LIFO stack containing identifier tokens
         :returns: None (pushes Name node to ValueStack)
         """
-        name = TokenStack.get()
+        name = TokenStack.pop()
 
         node = ast.Name(id=name.lexeme, ctx=ast.Store())
-        logger.info(f"Storing variable name {name.lexeme}")
-        ValueStack.put(node)
+        logger.debug("Storing variable name %s", name.lexeme)
+        ValueStack.push(node)
 
 class LogicOperation(Action):
     """Action for creating logical operation nodes in the AST.
@@ -245,24 +240,23 @@ class LogicOperation(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
         """Create and push logical operation node to ValueStack.
 
-        :param ValueStack: LIFO queue containing AST nodes in reverse order:
+        :param ValueStack: LIFO stack containing AST nodes in reverse order:
 
             - Top: Right operand
             - Next: Left operand
 
         :param TokenStack: Not used in this action (maintained for interface consistency)
         """
-        right = ValueStack.get()
-        left = ValueStack.get()
+        left, right = ValueStack.pop_n(2)
 
         node = ast.BoolOp(op=self.op, values=[left, right])
-        logger.info(f"Performing logical operation {self.op} on {left} and {right}")
-        ValueStack.put(node)
+        logger.debug("Performing logical operation %s on %s and %s", self.op, left, right)
+        ValueStack.push(node)
 
 class BinaryOperation(Action):
     """Action for performing binary operations in the abstract syntax tree.
@@ -301,25 +295,23 @@ class BinaryOperation(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
         """Create and push binary operation node to ValueStack.
 
-        :param ValueStack: LIFO queue containing AST nodes in reverse order:
+        :param ValueStack: LIFO stack containing AST nodes in reverse order:
 
             - Top: Right operand
             - Next: Left operand
 
         :param TokenStack: Not used in this action (maintained for interface consistency)
         """
-        right = ValueStack.get()
-        left = ValueStack.get()
-        print(right, left)
+        left, right = ValueStack.pop_n(2)
 
         node = ast.BinOp(left=left, op=self.op, right=right)
-        logger.info(f"Performing {self.op_name} on {left} and {right}")
-        ValueStack.put(node)
+        logger.debug("Performing %s on %s and %s", self.op_name, left, right)
+        ValueStack.push(node)
 
 
 class UnarySubtract(Action):
@@ -330,15 +322,14 @@ class UnarySubtract(Action):
     """
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
-        operand = ValueStack.get()
-        print(operand)
+        operand = ValueStack.pop()
 
         node = ast.UnaryOp(op=USub(), operand=operand)
-        logger.info(f"Unary subtract {operand}")
-        ValueStack.put(node)
+        logger.debug("Unary subtract %s", operand)
+        ValueStack.push(node)
 
 
 class Comparison(Action):
@@ -385,12 +376,12 @@ class Comparison(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
         """Create or extend comparison node in the AST.
 
-        :param ValueStack: LIFO queue containing AST nodes in order:
+        :param ValueStack: LIFO stack containing AST nodes in order:
 
             - Top: Right operand
             - Next: Left operand (might be existing :class:`ast.Compare`)
@@ -408,9 +399,7 @@ class Comparison(Action):
             # First creates Compare(a < b)
             # Then extends with <= c
         """
-        right = ValueStack.get()
-        left = ValueStack.get()
-        print("left", left, "right", right)
+        left, right = ValueStack.pop_n(2)
 
         if isinstance(left, ast.Compare):
             # Extend existing comparison chain
@@ -423,8 +412,8 @@ class Comparison(Action):
             # Create new comparison
             node = ast.Compare(left=left, ops=[self.op], comparators=[right])
 
-        logger.info(f"Comparison: {left} {self.symbol} {right}")
-        ValueStack.put(node)
+        logger.debug("Comparison: %s %s %s", left, self.symbol, right)
+        ValueStack.push(node)
 
 
 class If(Action):
@@ -443,12 +432,12 @@ class If(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
         """Construct and push an If node to the value stack.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
 
             - Top: Body statements (typically a list of AST nodes)
             - Next: Test condition expression (AST node)
@@ -456,12 +445,12 @@ class If(Action):
         :param TokenStack: Not used in this action (interface consistency)
 
         """
-        # body = ValueStack.get()
-        expr = ValueStack.get()
+        # body = ValueStack.pop()
+        expr = ValueStack.pop()
         # print("body", body, "expr", expr)
 
         node = ast.If(test=expr, body=[], orelse=[])
-        ValueStack.put(node)
+        ValueStack.push(node)
 
 
 class HandleElse(Action):
@@ -491,13 +480,13 @@ class HandleElse(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue[Token],
+        ValueStack: Stack[AST],
+        TokenStack: Stack[Token],
     ):
         """
         Process else clause and modify AST structure accordingly.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: Else clause body statements
             - Next: Either:
 
@@ -513,23 +502,23 @@ class HandleElse(Action):
         3. Handling implicit elif conversion when needed
 
         """
-        # else_body = ValueStack.get()
-        if_node_or_expr = ValueStack.get()
+        # else_body = ValueStack.pop()
+        if_node_or_expr = ValueStack.pop()
 
         if isinstance(if_node_or_expr, ast.If):
             if_node = if_node_or_expr
-            ValueStack.put(if_node)
+            ValueStack.push(if_node)
         else:
             expr = if_node_or_expr
-            if_node = ValueStack.get()
+            if_node = ValueStack.pop()
 
             current = if_node
             while current.orelse and isinstance(current.orelse[0], ast.If):
                 current = current.orelse[0]
 
             current.orelse = [ast.If(test=expr, body=[])]
-            ValueStack.put(if_node)
-            ValueStack.put(expr)
+            ValueStack.push(if_node)
+            ValueStack.push(expr)
 
         # if isinstance(if_node_or_expr, ast.If):
         #     if_node = if_node_or_expr
@@ -541,14 +530,14 @@ class HandleElse(Action):
         #     current.orelse = [else_body]
         # else:
         #     expr = if_node_or_expr
-        #     if_node = ValueStack.get()
+        #     if_node = ValueStack.pop()
         #
         #     current = if_node
         #     while current.orelse and isinstance(current.orelse[0], ast.If):
         #         current = current.orelse[0]
         #
         #     current.orelse = [ast.If(test=expr, body=[else_body])]
-        # ValueStack.put(if_node)
+        # ValueStack.push(if_node)
 
 
 class CleanUpElse(Action):
@@ -576,7 +565,7 @@ class CleanUpElse(Action):
     def call(self, ValueStack, TokenStack):
         """Normalizes stack state by ensuring proper If node placement.
 
-        :param ValueStack: LIFO queue containing either:
+        :param ValueStack: LIFO stack containing either:
             - Top: ast.If node (direct case), or
             - Top: Conditional expression
               Next: ast.If node (elif pattern case)
@@ -593,15 +582,15 @@ class CleanUpElse(Action):
         - Removing any temporary conditional expressions
         - Leaving the final If node properly positioned
         """
-        if_node_or_expr = ValueStack.get()
+        if_node_or_expr = ValueStack.pop()
 
         if isinstance(if_node_or_expr, ast.If):
             if_node = if_node_or_expr
         else:
             expr = if_node_or_expr
-            if_node = ValueStack.get()
+            if_node = ValueStack.pop()
 
-        ValueStack.put(if_node)
+        ValueStack.push(if_node)
 
 
 class CreateEmptyWhile(Action):
@@ -636,7 +625,7 @@ class CreateEmptyWhile(Action):
     def call(self, ValueStack, TokenStack):
         """Creates and pushes an empty While node to the value stack.
 
-        :param ValueStack: LIFO queue where the new While node will be pushed
+        :param ValueStack: LIFO stack where the new While node will be pushed
         :param TokenStack: Not used in this action (interface consistency)
 
         Processing flow:
@@ -654,7 +643,7 @@ class CreateEmptyWhile(Action):
         """
         node = ast.While(test=None, body=[])
 
-        ValueStack.put(node)
+        ValueStack.push(node)
 
 
 class HandleAllLoops(Action):
@@ -680,7 +669,7 @@ class HandleAllLoops(Action):
     def call(self, ValueStack, TokenStack):
         """Assembles loop components into parent body structure.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: Unconfigured While node
             - Next: Increment assignment node
             - Next: Initial assignment node
@@ -707,12 +696,12 @@ class HandleAllLoops(Action):
                 AugAssign(target=x, op=Add, value=1)
             ]
         """
-        # body = ValueStack.get()
-        # loop_data = ValueStack.get()
+        # body = ValueStack.pop()
+        # loop_data = ValueStack.pop()
 
-        while_node = ValueStack.get()
-        increment_node = ValueStack.get()
-        start_node = ValueStack.get()
+        while_node = ValueStack.pop()
+        increment_node = ValueStack.pop()
+        start_node = ValueStack.pop()
 
         # if loop_data["type"] == "range":
         #     # Construct while loop with initializer and increment
@@ -733,11 +722,11 @@ class HandleAllLoops(Action):
         #     ]
 
         # First push the starting variable value above the While loop
-        # ValueStack.put(loop_data["start"])
-        ValueStack.put(start_node)
+        # ValueStack.push(loop_data["start"])
+        ValueStack.push(start_node)
         StoreToBody().call(ValueStack, TokenStack)
-        ValueStack.put(while_node)
-        ValueStack.put(increment_node)
+        ValueStack.push(while_node)
+        ValueStack.push(increment_node)
         StoreToBody().call(ValueStack, TokenStack)
 
 
@@ -762,7 +751,7 @@ class CreateRangeCondition(Action):
     def call(self, ValueStack, TokenStack):
         """Process range components and configure While loop node.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: End value (AST node)
             - Next: Initial assignment node (ast.Assign)
             - Next: Unconfigured While node (ast.While)
@@ -791,9 +780,9 @@ class CreateRangeCondition(Action):
                 AugAssign(target=x, op=Add, value=1)
                 Assign(target=x, value=1)
         """
-        end = ValueStack.get()
-        assign_node = ValueStack.get()
-        while_node: ast.While = ValueStack.get()
+        end = ValueStack.pop()
+        assign_node = ValueStack.pop()
+        while_node: ast.While = ValueStack.pop()
 
         target = assign_node.targets[0]
         start = assign_node
@@ -809,9 +798,9 @@ class CreateRangeCondition(Action):
         increment_node = ast.AugAssign(target=target, op=ast.Add(), value=step)
 
         while_node.test = test
-        ValueStack.put(assign_node)
-        ValueStack.put(increment_node)
-        ValueStack.put(while_node)
+        ValueStack.push(assign_node)
+        ValueStack.push(increment_node)
+        ValueStack.push(while_node)
 
 
 class ExtendRangeCondition(Action):
@@ -831,7 +820,7 @@ class ExtendRangeCondition(Action):
     def call(self, ValueStack, TokenStack):
         """Process step value and finalize range condition configuration.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: Final end value for range
             - Next: While node with initial test
             - Next: Increment node with step value
@@ -858,10 +847,10 @@ class ExtendRangeCondition(Action):
             While(test=x <= 20, ...)
             AugAssign(value=2)
         """
-        end = ValueStack.get()
-        # loop_data = ValueStack.get()
-        while_node: ast.While = ValueStack.get()
-        increment_node: ast.AugAssign = ValueStack.get()
+        end = ValueStack.pop()
+        # loop_data = ValueStack.pop()
+        while_node: ast.While = ValueStack.pop()
+        increment_node: ast.AugAssign = ValueStack.pop()
 
         increment_node.value = while_node.test.comparators[0]
 
@@ -883,9 +872,9 @@ class ExtendRangeCondition(Action):
         # loop_data["test"].comparators=[end]
         # loop_data["increment"] = ast.AugAssign(target=loop_data["target"], op=ast.Add(), value=step)
 
-        # ValueStack.put(loop_data)
-        ValueStack.put(increment_node)
-        ValueStack.put(while_node)
+        # ValueStack.push(loop_data)
+        ValueStack.push(increment_node)
+        ValueStack.push(while_node)
 
 
 class CreateWhileCondition(Action):
@@ -910,7 +899,7 @@ class CreateWhileCondition(Action):
     def call(self, ValueStack, TokenStack):
         """Packages while-loop components into a structured dictionary.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: step (AST node, typically constant 0)
             - Next: test (ast.Compare node)
             - Next: init (ast.Assign node)
@@ -926,10 +915,7 @@ class CreateWhileCondition(Action):
                 "step": Assign(target=x, value=0)
             }
         """
-        step = ValueStack.get()
-        test = ValueStack.get()
-        init = ValueStack.get()
-        target = ValueStack.get()
+        target, init, test, step = ValueStack.pop_n(4)
 
         return {"init": init, "test": test, "step": step}
 
@@ -954,12 +940,12 @@ class Break(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue,
+        ValueStack: Stack[AST],
+        TokenStack: Stack,
     ):
         """Creates and pushes a Break node to the value stack.
 
-        :param ValueStack: LIFO queue where the Break node will be added
+        :param ValueStack: LIFO stack where the Break node will be added
         :param TokenStack: Not used in this action (interface consistency)
 
         Processing flow:
@@ -975,7 +961,7 @@ class Break(Action):
         """
         node = ast.Break()
 
-        ValueStack.put(node)
+        ValueStack.push(node)
 
 
 class Print(Action):
@@ -992,7 +978,7 @@ class Print(Action):
     def call(self, ValueStack, TokenStack):
         """Creates and pushes a print call node to the value stack.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: Value to be printed (AST node)
         :param TokenStack: Not used in this action (interface consistency)
 
@@ -1013,13 +999,13 @@ class Print(Action):
         .. note:: Only supports single-argument print statements. For multiple
         arguments, additional handling would be required.
         """
-        value = ValueStack.get()
+        value = ValueStack.pop()
 
         node = ast.Expr(
             value=ast.Call(func=ast.Name(id="print", ctx=ast.Load()), args=[value])
         )
 
-        ValueStack.put(node)
+        ValueStack.push(node)
 
 
 class Imports(Action):
@@ -1034,12 +1020,12 @@ class Imports(Action):
 
     def call(
         self,
-        ValueStack: LifoQueue[AST],
-        TokenStack: LifoQueue,
+        ValueStack: Stack[AST],
+        TokenStack: Stack,
     ):
         """Creates and stores import nodes in the AST body.
 
-        :param ValueStack: LIFO queue used for AST construction
+        :param ValueStack: LIFO stack used for AST construction
         :param TokenStack: Not used in this action (interface consistency)
 
         Processing Flow:
@@ -1069,9 +1055,9 @@ class Imports(Action):
             level=0,  # Absolute import
         )
 
-        ValueStack.put(import_meep)
+        ValueStack.push(import_meep)
         StoreToBody().call(ValueStack, TokenStack)      # Called from here to ensure there aren't two imports because the 
-        ValueStack.put(import_selector)                 # actions.StoreToBody() needs a body to store to.
+        ValueStack.push(import_selector)                 # actions.StoreToBody() needs a body to store to.
 
 
 class CreateSelector(Action):
@@ -1092,10 +1078,10 @@ class CreateSelector(Action):
         )
     """
 
-    def call(self, ValueStack, TokenStack: LifoQueue):
+    def call(self, ValueStack, TokenStack: Stack):
         """Creates and pushes a Selector initialization node to the value stack.
 
-        :param ValueStack: LIFO queue where the assignment node will be placed
+        :param ValueStack: LIFO stack where the assignment node will be placed
         :param TokenStack: Not used in this action (interface consistency)
 
         Node Details:
@@ -1117,7 +1103,7 @@ class CreateSelector(Action):
                 func=ast.Name(id="Selector", ctx=ast.Load()), args=[], keywords=[]
             ),
         )
-        ValueStack.put(node)
+        ValueStack.push(node)
 
 
 class SetProperty(Action):
@@ -1133,10 +1119,10 @@ class SetProperty(Action):
     - `mp` module import (from meep)
     """
 
-    def call(self, ValueStack, TokenStack: LifoQueue):
+    def call(self, ValueStack, TokenStack: Stack):
         """Creates AST nodes for property assignment loops.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: Property value (AST node)
             - Next: Property name (ast.Constant)
         :param TokenStack: Not used directly (interface consistency)
@@ -1173,9 +1159,9 @@ class SetProperty(Action):
                 ]
             )
         """
-        value = ValueStack.get()
-        name: ast.Constant = ValueStack.get()
-        logger.debug(f"Processing property {name.value} with value {value}")
+        value = ValueStack.pop()
+        name: ast.Constant = ValueStack.pop()
+        logger.debug("Processing property %s with value %s", name.value, value)
 
         # Common AST components
         selector_ref = ast.Name(id="selector", ctx=ast.Load())
@@ -1225,7 +1211,7 @@ class SetProperty(Action):
                 ]
                 loop = create_getSelected_loop(body)
 
-                ValueStack.put(loop)
+                ValueStack.push(loop)
 
             case axis if axis in {"x", "y", "z"}:
                 # Generate vector components while preserving others
@@ -1245,7 +1231,7 @@ class SetProperty(Action):
                 ]
                 loop_body = create_loop_body("center", components)
                 loop = create_getSelected_loop([loop_body])
-                ValueStack.put(loop)
+                ValueStack.push(loop)
 
             case span if span.endswith(" span"):
                 axis = span.split()[0]
@@ -1294,7 +1280,7 @@ class SetProperty(Action):
                     orelse=[ create_loop_body("size", components_block)],
                 )
                 loop = create_getSelected_loop([loop_body])
-                ValueStack.put(loop)
+                ValueStack.push(loop)
                 
             case "frequency":
                 # record.src.frequency = value
@@ -1315,7 +1301,7 @@ class SetProperty(Action):
                     )
                 ]
                 loop = create_getSelected_loop(body)
-                ValueStack.put(loop)
+                ValueStack.push(loop)
 
             case "wavelength":
                 body = [
@@ -1339,7 +1325,7 @@ class SetProperty(Action):
                     )
                 ]
                 loop = create_getSelected_loop(body)
-                ValueStack.put(loop)
+                ValueStack.push(loop)
 
             case "component":
                 body = [
@@ -1355,7 +1341,7 @@ class SetProperty(Action):
                     )
                 ]
                 loop = create_getSelected_loop(body)
-                ValueStack.put(loop)
+                ValueStack.push(loop)
 
             case "direction":
                 loop_body = ast.Assign(
@@ -1369,7 +1355,7 @@ class SetProperty(Action):
                     value=value
                 )
                 loop = create_getSelected_loop([loop_body])
-                ValueStack.put(loop)
+                ValueStack.push(loop)
 
             case "dimension":
                 body = [
@@ -1385,11 +1371,11 @@ class SetProperty(Action):
                     )
                 ]
                 loop = create_getSelected_loop(body)
-                ValueStack.put(loop)
+                ValueStack.push(loop)
 
             case _:
                 logger.warning(f"Unsupported property: {name.value}")
-                ValueStack.put(ast.Pass())
+                ValueStack.push(ast.Pass())
 
 class AddDFTMonitor(Action):
     """Action for creating and adding a basic DFT monitor to the selector.
@@ -1415,7 +1401,7 @@ class AddDFTMonitor(Action):
     - PX/PY/PZ are assumed to be derived from E and H in post-processing
     """
 
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         # Add DFT fields monitor
         dft_fields = ast.Call(
             func=ast.Attribute(
@@ -1456,7 +1442,7 @@ class AddDFTMonitor(Action):
             ]
         )
 
-        ValueStack.put(
+        ValueStack.push(
             AddToSelector(
                 [
                     ast.Constant(value="DFT Monitor"),
@@ -1536,10 +1522,10 @@ class AddRect(Action):
         ))
     """
 
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         """Creates and pushes rectangle Record addition to the value stack.
 
-        :param ValueStack: LIFO queue where the expression will be pushed
+        :param ValueStack: LIFO stack where the expression will be pushed
         :param TokenStack: Not used in this action (interface consistency)
 
         Node Structure:
@@ -1555,7 +1541,7 @@ class AddRect(Action):
         .. note:: Currently uses hardcoded default values. For dynamic size/materials,
         additional processing would be needed.
         """
-        ValueStack.put(
+        ValueStack.push(
             AddToSelector(
                 [
                     ast.Constant(value="Rectangle"),
@@ -1605,10 +1591,10 @@ class AddSphere(Action):
         ))
     """
 
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         """Creates and pushes sphere Record addition to the value stack.
 
-        :param ValueStack: LIFO queue where the expression will be pushed
+        :param ValueStack: LIFO stack where the expression will be pushed
         :param TokenStack: Not used in this action (interface consistency)
 
         Node Structure:
@@ -1624,7 +1610,7 @@ class AddSphere(Action):
         .. note:: Currently uses hardcoded default values. For dynamic size/materials,
         additional processing would be needed.
         """
-        ValueStack.put(
+        ValueStack.push(
             AddToSelector(
                 [
                     ast.Constant(value="Sphere"),
@@ -1662,10 +1648,10 @@ class AddFDTD(Action):
         ))
     """
 
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         """Creates and pushes FDTD simulation Record addition to the value stack.
 
-        :param ValueStack: LIFO queue where the expression will be pushed
+        :param ValueStack: LIFO stack where the expression will be pushed
         :param TokenStack: Not used in this action (interface consistency)
 
         Node Structure:
@@ -1684,7 +1670,7 @@ class AddFDTD(Action):
         - Other simulation parameters (not shown)
         Real-world usage would require extending with actual parameters.
         """
-        ValueStack.put(
+        ValueStack.push(
             AddToSelector(
                 [
                     ast.Constant(value="Simulation"),  # Record name
@@ -1720,7 +1706,7 @@ class AddFDTD(Action):
         )
 
 class Run(Action):
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         selector_ref = ast.Name(id="selector", ctx=ast.Load())
 
         # Get all geometry
@@ -1755,12 +1741,12 @@ class Run(Action):
                         value=ast.Name(id="geometry", ctx=ast.Load()),
                     )],
                 orelse=[],
-            )c
+            )
         
 
-        ValueStack.put(geometry)
+        ValueStack.push(geometry)
         StoreToBody().call(ValueStack, TokenStack)
-        ValueStack.put(assign_geometry)
+        ValueStack.push(assign_geometry)
 
 
 
@@ -1786,7 +1772,7 @@ class AddPlaneSource(Action):
         ))
     """
 
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         source_call = ast.Call(
             func=ast.Attribute(value=ast.Name(id="mp", ctx=ast.Load()), attr="Source", ctx=ast.Load()),
             args=[],
@@ -1851,7 +1837,7 @@ class AddPlaneSource(Action):
             ]
         )
 
-        ValueStack.put(
+        ValueStack.push(
             AddToSelector([
                 ast.Constant(value="PlaneSource"),
                 source_call,
@@ -1868,10 +1854,10 @@ class SelectAll(Action):
     Lumerical's scripting context.
     """
 
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         """Creates and pushes a selectAll call node to the value stack.
 
-        :param ValueStack: LIFO queue where the expression will be placed
+        :param ValueStack: LIFO stack where the expression will be placed
         :param TokenStack: Not used in this action (interface consistency)
 
         Generated AST Node:
@@ -1913,7 +1899,7 @@ class SelectAll(Action):
                 keywords=[],
             )
         )
-        ValueStack.put(node)
+        ValueStack.push(node)
 
 
 class UnselectAll(Action):
@@ -1924,10 +1910,10 @@ class UnselectAll(Action):
     Lumerical's scripting context.
     """
 
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         """Creates and pushes an unselectAll call node to the value stack.
 
-        :param ValueStack: LIFO queue where the expression will be placed
+        :param ValueStack: LIFO stack where the expression will be placed
         :param TokenStack: Not used in this action (interface consistency)
 
         Generated AST Node:
@@ -1970,7 +1956,7 @@ class UnselectAll(Action):
                 keywords=[],
             )
         )
-        ValueStack.put(node)
+        ValueStack.push(node)
 
 
 class Select(Action):
@@ -1980,10 +1966,10 @@ class Select(Action):
     selector object to select a specific record by name.
     """
 
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         """Creates and pushes a select call node to the value stack.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: Name of record to select (ast.Constant)
         :param TokenStack: Not used in this action (interface consistency)
 
@@ -2015,7 +2001,7 @@ class Select(Action):
         .. note:: Typically used for precise selection of individual records
         after initial bulk operations.
         """
-        name = ValueStack.get()
+        name = ValueStack.pop()
         node = ast.Expr(
             value=ast.Call(
                 func=ast.Attribute(
@@ -2027,7 +2013,7 @@ class Select(Action):
                 keywords=[],
             )
         )
-        ValueStack.put(node)
+        ValueStack.push(node)
 
 
 class ShiftSelect(Action):
@@ -2038,10 +2024,10 @@ class ShiftSelect(Action):
     in GUI environments).
     """
 
-    def call(self, ValueStack: LifoQueue, TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack, TokenStack: Stack):
         """Creates and pushes a shiftSelect call node to the value stack.
 
-        :param ValueStack: LIFO queue containing:
+        :param ValueStack: LIFO stack containing:
             - Top: Name of record to add to selection (ast.Constant)
         :param TokenStack: Not used in this action (interface consistency)
 
@@ -2073,7 +2059,7 @@ class ShiftSelect(Action):
         .. note:: Used for cumulative selections rather than replacing the current selection.
         Typically combined with initial select() or selectAll() calls.
         """
-        name = ValueStack.get()
+        name = ValueStack.pop()
         node = ast.Expr(
             value=ast.Call(
                 func=ast.Attribute(
@@ -2085,4 +2071,4 @@ class ShiftSelect(Action):
                 keywords=[],
             )
         )
-        ValueStack.put(node)
+        ValueStack.push(node)
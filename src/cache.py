@@ -0,0 +1,38 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def cacheDirectory() -> Path:
+    """Return the directory where generated lexers and compiled tables are cached.
+
+    The ``LUMEX_CACHE_DIR`` environment variable takes precedence, otherwise ``$XDG_CACHE_HOME/lumex`` or
+    ``~/.cache/lumex`` is used. The directory is created if it does not exist.
+
+    :return: The cache directory.
+    """
+    directory = os.environ.get("LUMEX_CACHE_DIR")
+    if directory is None:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        directory = Path(base) / "lumex"
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def writeAtomic(path: Path, data: bytes) -> None:
+    """Write a cache file so other processes never see it half written.
+
+    The data is written to a temporary file in the same directory, which then replaces :py:attr:`path`.
+
+    :param path: The cache file.
+    :param data: The file contents.
+    """
+    handle, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
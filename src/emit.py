@@ -0,0 +1,132 @@
+import ast
+import logging
+from dataclasses import dataclass, field
+from typing import Callable
+from lex import TokenStream
+from lltable import LLTable
+from stack import Stack
+from symbol import NonTerminal
+from tokens import Token
+
+logger = logging.getLogger(__name__)
+
+STATEMENTS = "body"
+"""Nonterminal deriving the sequence of top-level statements, after the prelude of the ``root`` production."""
+
+
+class StreamingBody(list):
+    """Body of the root :py:class:`ast.Module` of a :py:class:`parse.Parser` that streams its output.
+
+    Top-level statements are stored by :py:class:`actions.StoreToBody`, which appends them to the body of the
+    module at the bottom of the value stack. Instead of keeping them, this list unparses every statement and
+    passes the code to :py:attr:`sink` right away, so memory does not grow with the number of statements.
+
+    Tokens left on the token stack are dropped at the same time. The actions take the tokens they need right after
+    they are matched, the rest, like ``;``, would otherwise pile up for the whole parse.
+
+    Example usage::
+
+        parser = Parser(lumerical_grammar, lexer, sink=sys.stdout.write)
+        parser.parse()
+
+    :param sink: Called with the Python code of every statement, each ending with a newline.
+    :param tokenStack: The token stack of the parser.
+    :param emitted: Number of statements passed to :py:attr:`sink`.
+    """
+
+    def __init__(self, sink: Callable[[str], object], tokenStack: Stack[Token]) -> None:
+        """StreamingBody constructor.
+
+        :param sink: Called with the Python code of every statement.
+        :param tokenStack: The token stack of the parser, cleared whenever a statement is emitted.
+        """
+        super().__init__()
+        self.sink = sink
+        self.tokenStack = tokenStack
+        self.emitted = 0
+
+    def append(self, statement: ast.stmt) -> None:
+        """Emit a completed top-level statement instead of storing it.
+
+        :param statement: The statement.
+        """
+        self.sink(ast.unparse(ast.fix_missing_locations(statement)) + "\n")
+        self.emitted += 1
+        self.tokenStack.clear()
+        logger.debug("Emitted statement %d", self.emitted)
+
+
+@dataclass
+class Statement:
+    """A top-level statement recorded by :py:class:`RecordingBody`.
+
+    :param start: Source offset of the first token of the statement.
+    :param end: Source offset of the first token after it, the next statement starts there.
+    :param nodes: The nodes the statement added to the module body, usually one.
+    """
+
+    start: int
+    end: int
+    nodes: list[ast.AST] = field(default_factory=list)
+
+
+class RecordingBody(list):
+    """Body of the root :py:class:`ast.Module` of a :py:class:`parse.Parser` that records its statements.
+
+    The body is filled like a plain list, and every node is also assigned to the top-level :py:class:`Statement`
+    that produced it. A statement is complete once the next token could start another statement of
+    :py:data:`STATEMENTS`, a statement like ``for`` that stores several nodes stores its first ones while its
+    closing ``}`` is still ahead. Nodes stored before any token is consumed, like the imports, go to
+    :py:attr:`prelude`.
+
+    A statement is independent of the ones before it only if it leaves nothing behind on the value stack,
+    :py:attr:`independent` turns False as soon as one does.
+
+    :param table: The LL table of the parser.
+    :param tokens: The token stream of the parser.
+    :param valueStack: The value stack of the parser.
+    :param row: Row of :py:data:`STATEMENTS` in :py:attr:`table`.
+    :param statements: The complete statements, in source order.
+    :param prelude: Nodes stored before the first statement.
+    :param pending: Nodes of the statement being parsed.
+    :param start: Source offset where the statement being parsed starts.
+    :param independent: Whether every statement left only the module on the value stack.
+    """
+
+    def __init__(self, table: LLTable, tokens: TokenStream, valueStack: Stack[ast.AST]) -> None:
+        """RecordingBody constructor.
+
+        :param table: The LL table of the parser.
+        :param tokens: The token stream of the parser.
+        :param valueStack: The value stack of the parser, the module is its only item between statements.
+        """
+        super().__init__()
+        self.table = table
+        self.tokens = tokens
+        self.valueStack = valueStack
+        self.independent = True
+        self.row = table.nonTerminalIds[NonTerminal(STATEMENTS)]
+        self.statements: list[Statement] = []
+        self.prelude: list[ast.AST] = []
+        self.pending: list[ast.AST] = []
+        first = tokens.peek()
+        self.start: int = first.start if first is not None else 0
+
+    def append(self, node: ast.AST) -> None:
+        """Store a node and close the current statement if the next token starts a new one.
+
+        :param node: A node of the module body.
+        """
+        super().append(node)
+        if self.tokens.dropped + self.tokens.position == 0:
+            self.prelude.append(node)
+            return
+        self.pending.append(node)
+        lookahead = self.tokens.peek()
+        table = self.table
+        column = table.terminalIds.get(type(lookahead), table.width - 1)
+        if lookahead is not None and table.Prediction(self.row, column):
+            self.statements.append(Statement(self.start, lookahead.start, self.pending))
+            self.independent = self.independent and len(self.valueStack) == 1
+            self.pending = []
+            self.start = lookahead.start
@@ -1,5 +1,5 @@
 from symbol import Epsilon, Terminal, NonTerminal, Action
-from typing import List, Set
+from typing import FrozenSet, List, Set
 from tokens import *
 
 
@@ -16,7 +16,8 @@ class Production:
     :param LHS: Left-hand-side of the production.
     :param RHS: Right-hand-side of the production.
     :param RHS_clean: Right-hand-side of the production with no actions, used in LL table generation.
-    :param nullable: Specifies if the production is nullable.
+    :param nullable: Specifies if the production is nullable, set by :py:attr:`Grammar.nullable_nonterminals`.
+    :param number: Position of the production in its grammar starting from 1, assigned by :py:meth:`Grammar.append`.
     """
 
     number: int = 0
@@ -27,7 +28,6 @@ class Production:
         LHS: NonTerminal,
         RHS: List[NonTerminal | Terminal | Action] | Epsilon,
         nullable: bool = False,
-        increment_number=True,
     ) -> None:
         self.LHS = LHS
         self.RHS = RHS
@@ -38,9 +38,7 @@ class Production:
                 item for item in self.RHS if isinstance(item, NonTerminal | Terminal)
             ]
         self.nullable = nullable
-        if increment_number:
-            Production.number += 1
-        self.number = Production.number
+        self.number = 0
 
     def __str__(self) -> str:
         return f"{self.LHS}\t-> {(' '.join([str(x) for x in self.RHS])) if not isinstance(self.RHS,Epsilon) else 'epsilon'}\n"
@@ -54,26 +52,51 @@ class Grammar:
 
     def __init__(self) -> None:
         self.productions: List[Production] = []
-        self.nullable_nonterminals: Set[NonTerminal] = set()
+        self.nullables: FrozenSet[NonTerminal] | None = None
 
     def append(self, prod: Production):
-        if prod.RHS == Epsilon():
-            self.nullable_nonterminals |= {prod.LHS}
-            prod.nullable = True
-            for previous in self.productions:
-                if previous.LHS == prod.LHS:
-                    previous.nullable = True
-        else:
-            if prod.LHS in self.nullable_nonterminals:
-                prod.nullable = True
+        prod.number = len(self.productions) + 1
         self.productions.append(prod)
+        self.nullables = None
+
+    @property
+    def nullable_nonterminals(self) -> FrozenSet[NonTerminal]:
+        """The nullable nonterminals, computed on first use after the last :py:meth:`append`.
+
+        A nonterminal is nullable if it has an epsilon production, or a production whose RHS consists only of
+        nullable nonterminals. Productions are checked again until no nonterminal is added, which also finds
+        nonterminals nullable through a chain of others. The ``nullable`` flag of every production is set if its
+        own RHS is epsilon or consists only of nullable nonterminals.
+
+        :return: The nullable nonterminals.
+        """
+        if self.nullables is None:
+            nullables: Set[NonTerminal] = set()
+            changed = True
+            while changed:
+                changed = False
+                for production in self.productions:
+                    if production.LHS in nullables:
+                        continue
+                    if isinstance(production.RHS_clean, Epsilon) or all(
+                        symbol in nullables for symbol in production.RHS_clean
+                    ):
+                        nullables.add(production.LHS)
+                        changed = True
+            for production in self.productions:
+                production.nullable = isinstance(production.RHS_clean, Epsilon) or all(
+                    symbol in nullables for symbol in production.RHS_clean
+                )
+            self.nullables = frozenset(nullables)
+        return self.nullables
 
     def isNullable(self, nonterminal: NonTerminal) -> bool:
-        for production in self.productions:
-            if production.LHS == nonterminal:
-                return production.nullable
+        """Check if a nonterminal can derive epsilon, see :py:attr:`nullable_nonterminals`.
 
-        raise ValueError("Did not find Nonterninal as a LHS of any rule.")
+        :param nonterminal: The nonterminal.
+        :return: Whether it is nullable.
+        """
+        return nonterminal in self.nullable_nonterminals
 
     def terminals(self) -> Set[Terminal]:
         """List all terminals which are subclasses of Token or Literal.
@@ -0,0 +1,154 @@
+import ast
+import logging
+from emit import STATEMENTS, RecordingBody, Statement
+from lex import Lexer
+from parse import Parser
+from transpiler import Transpiler
+
+logger = logging.getLogger(__name__)
+
+
+class Document:
+    """A source kept transpiled across edits, reparsing only the top-level statements an edit touches.
+
+    The first parse records the span and nodes of every top-level statement, see :py:class:`emit.RecordingBody`.
+    :py:meth:`edit` reparses the statements whose spans touch the edited range, as a sequence of
+    :py:data:`emit.STATEMENTS` ending where the next untouched statement starts, and splices the result in.
+    The other statements and their nodes are reused, only their offsets are shifted. If the region does not
+    parse on its own, for example because the edit removed the ``;`` between two statements, the whole source
+    is parsed again. So is every edit of a source whose statements are not independent, see
+    :py:attr:`emit.RecordingBody.independent`.
+
+    Example usage::
+
+        document = Document(Transpiler(), source)
+        document.edit(offset, deleted, "y = 2;")
+        print(document.transpile())
+
+    :param transpiler: Provides the grammar, table and scanner.
+    :param source: The current source code.
+    :param prelude: Nodes stored before the first statement, like the imports.
+    :param statements: The top-level statements of :py:attr:`source`, in order.
+    :param independent: Whether the statements can be reparsed one by one.
+    """
+
+    def __init__(self, transpiler: Transpiler, source: str) -> None:
+        """Document constructor, parses the whole source.
+
+        :param transpiler: Provides the grammar, table and scanner.
+        :param source: Lumerical source code.
+        :raises ValueError: The source can not be lexed or parsed.
+        """
+        self.transpiler = transpiler
+        self.source = source
+        self.prelude: list[ast.AST] = []
+        self.statements: list[Statement] = []
+        self.independent = False
+        self.parseAll()
+
+    def parser(self, lexer: Lexer, start: str) -> Parser:
+        """Create a parser recording the statements it parses.
+
+        :param lexer: Lexer positioned at the first token to parse.
+        :param start: Name of the nonterminal to parse.
+        :return: The parser.
+        """
+        transpiler = self.transpiler
+        return Parser(
+            transpiler.grammar,
+            lexer,
+            generated=transpiler.generated,
+            table=transpiler.table,
+            record=True,
+            start=start,
+        )
+
+    def parseAll(self) -> None:
+        """Parse the whole source and record its statements.
+
+        :raises ValueError: The source can not be lexed or parsed.
+        """
+        self.statements = []
+        parser = self.parser(Lexer(self.source, scanner=self.transpiler.scanner), "root")
+        parser.parse()
+        body: RecordingBody = parser.valueStack.get().body
+        self.prelude, self.statements, self.independent = body.prelude, body.statements, body.independent
+        logger.info(f"Parsed {len(self.statements)} statements")
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> int:
+        """Replace part of the source and update the statements.
+
+        :param offset: Where the edit starts in the current source.
+        :param deleted: Number of characters removed at :py:attr:`offset`.
+        :param inserted: Text inserted at :py:attr:`offset`.
+        :raises ValueError: The edited source can not be lexed or parsed. No statements are kept then, the next
+            edit parses the whole source again.
+        :return: Number of statements that were parsed, all of them if the whole source was parsed again.
+        """
+        old_length = len(self.source)
+        self.source = self.source[:offset] + inserted + self.source[offset + deleted :]
+        if not self.independent or not self.statements:
+            self.parseAll()
+            return len(self.statements)
+        shift = len(inserted) - deleted
+        edit_end = offset + deleted
+        statements = self.statements
+
+        first = 0
+        while first < len(statements) and statements[first].end < offset:
+            first += 1
+        last = first
+        while last < len(statements) and statements[last].start <= edit_end:
+            last += 1
+        start = statements[first].start if 0 < first < len(statements) else 0
+        start = min(start, offset)
+        end = statements[last].start + shift if last < len(statements) else len(self.source)
+
+        try:
+            reparsed = self.parseRegion(start, end)
+        except Exception as error:
+            logger.info(f"Parsing the whole source, the edited region does not parse on its own: {error!r}")
+            self.parseAll()
+            return len(self.statements)
+
+        for statement in statements[last:]:
+            statement.start += shift
+            statement.end += shift
+        self.statements = statements[:first] + reparsed + statements[last:]
+        logger.info(f"Reparsed statements {first} to {last} of {len(statements)}, source length {old_length} to {len(self.source)}")
+        return len(reparsed)
+
+    def parseRegion(self, start: int, end: int) -> list[Statement]:
+        """Parse the statements between two offsets of the source.
+
+        :param start: Offset where the first statement starts, or whitespace before it.
+        :param end: Offset where the region ends, the start of the next statement or the end of the source.
+        :raises ValueError: The region is not a sequence of complete statements.
+        :return: The parsed statements.
+        """
+        lexer = Lexer(self.source[:end], scanner=self.transpiler.scanner)
+        lexer.cursor = start
+        parser = self.parser(lexer, STATEMENTS)
+        parser.parse()
+        body: RecordingBody = parser.valueStack.get().body
+        if body.pending or body.prelude:
+            raise ValueError("Edited region does not end with a complete statement")
+        if not body.independent:
+            raise ValueError("Edited region leaves values behind for the following statements")
+        return body.statements
+
+    @property
+    def tree(self) -> ast.Module:
+        """The module of the current source.
+
+        :return: The prelude followed by the nodes of all statements.
+        """
+        body = self.prelude + [node for statement in self.statements for node in statement.nodes]
+        return ast.fix_missing_locations(ast.Module(body=body, type_ignores=[]))
+
+    def transpile(self) -> str:
+        """Unparse the module of the current source.
+
+        :return: Python source code.
+        """
+        return ast.unparse(self.tree)
@@ -1,73 +1,554 @@
 import re
+import os
+import mmap
 import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import BinaryIO
 from tokens import *
+from tokenstore import LineIndex, TokenStore
+from tracing import TRACE
 from typing_extensions import Generator
 
 logger = logging.getLogger(__name__)
 
 
+def tokenClasses() -> tuple[tuple[type[Token], ...], tuple[type[Keyword], ...]]:
+    """Collect the token classes defined in :py:mod:`tokens`, in the priority order used by the :py:class:`Lexer`.
+
+    :return: The token classes matched by their pattern and the keyword classes.
+    """
+    token_classes = tuple(
+        subclass
+        for subclass in Token.__subclasses__() + Literal.__subclasses__()
+        if subclass.__name__ not in ("Literal", "Keyword")
+    )
+    return token_classes, tuple(Keyword.__subclasses__())
+
+
+class Scanner:
+    """The Scanner compiles the ``lexeme_pattern`` of every token class into a single master regular expression.
+
+    Every pattern is wrapped in an optional lookahead holding a capture group, so one call to
+    :py:meth:`re.Pattern.match` tries all the patterns at the cursor and records how far each one reaches.
+    The longest capture wins, on a tie the token class listed first wins. This is the same longest-match rule
+    the :py:class:`Lexer` used when it tried the patterns one by one.
+
+    Keywords are not part of the master regular expression. They are spelled like identifiers, so a matched
+    :py:class:`tokens.Identifier` is classified with a single lookup in :py:attr:`keywords`.
+
+    A binary scanner matches bytes-like sources, such as a memory-mapped file, instead of strings.
+
+    :param classes: Token classes in priority order, ``classes[i]`` is the token class of capture group ``i + 1``.
+    :param keywords: Maps the lexeme of every keyword to its :py:class:`tokens.Keyword` class.
+    :param kinds: Every token class the scanner can produce, the position in the list is the kind of the token class.
+    :param kindIds: Maps every token class in :py:attr:`kinds` to its kind.
+    :param regex: The compiled master regular expression.
+    :param binary: Whether the scanner matches bytes-like sources.
+    """
+
+    def __init__(
+        self,
+        token_classes: tuple[type[Token], ...],
+        keyword_classes: tuple[type[Keyword], ...] = (),
+        binary: bool = False,
+    ):
+        """Scanner constructor, compiles the master regular expression and the keyword table.
+
+        :param token_classes: Token classes in priority order.
+        :param keyword_classes: Keyword classes, their ``lexeme_pattern`` is the reserved word.
+        :param binary: Compile the scanner for bytes-like sources.
+        :raises ValueError: A ``lexeme_pattern`` contains a capturing group or a keyword is not a valid identifier.
+        """
+        alternatives = []
+        for group, token_class in enumerate(token_classes):
+            if re.compile(token_class.lexeme_pattern).groups:
+                raise ValueError(
+                    f"Lexeme pattern of {token_class.__name__} must not contain capturing groups"
+                )
+            alternatives.append(f"(?:(?=(?P<t{group}>{token_class.lexeme_pattern})))?")
+        pattern = "".join(alternatives)
+        self.classes: list[type[Token]] = list(token_classes)
+        self.binary = binary
+        self.regex = re.compile(pattern.encode() if binary else pattern)
+
+        self.keywords: dict[str | bytes, type[Token]] = {}
+        for keyword_class in keyword_classes:
+            if not re.fullmatch(Identifier.lexeme_pattern, keyword_class.lexeme_pattern):
+                raise ValueError(f"Keyword {keyword_class.__name__} is not a valid identifier")
+            keyword = keyword_class.lexeme_pattern
+            self.keywords[keyword.encode() if binary else keyword] = keyword_class
+
+        self.kinds: list[type[Token]] = self.classes + list(keyword_classes)
+        self.kindIds: dict[type[Token], int] = {
+            token_class: kind for kind, token_class in enumerate(self.kinds)
+        }
+
+    def match(self, source: str | bytes, position: int) -> tuple[type[Token], int] | None:
+        """Find the longest lexeme starting at :py:attr:`position`.
+
+        :param source: The source code.
+        :param position: Where the lexeme starts.
+        :return: The matching token class and the end of its lexeme, None if no pattern matches.
+        """
+        spans = self.regex.match(source, position).regs
+        longest = max(spans[1:])
+        if longest[0] < 0:
+            return None
+        token_class = self.classes[spans.index(longest, 1) - 1]
+        if token_class is Identifier:
+            token_class = self.keywords.get(source[position : longest[1]], Identifier)
+        return token_class, longest[1]
+
+
+@lru_cache(maxsize=None)
+def compileScanner(
+    token_classes: tuple[type[Token], ...],
+    keyword_classes: tuple[type[Keyword], ...] = (),
+    binary: bool = False,
+) -> Scanner:
+    """Return the :py:class:`Scanner` for the given token classes, every set of token classes is compiled only once.
+
+    :param token_classes: Token classes in priority order.
+    :param keyword_classes: Keyword classes resolved through the keyword table.
+    :param binary: Compile the scanner for bytes-like sources.
+    :return: The compiled scanner.
+    """
+    return Scanner(token_classes, keyword_classes, binary)
+
+
+def lexChunk(
+    chunk: str | bytes,
+    offset: int,
+    token_classes: tuple[type[Token], ...],
+    keyword_classes: tuple[type[Keyword], ...],
+) -> tuple[bytes, bytes, bytes, bool]:
+    """Lex one chunk of a source for :py:meth:`Lexer.tokenizeParallel`, runs in a worker process.
+
+    The token arrays are returned as raw bytes, so they are cheap to send back to the parent process.
+    Whitespace and :py:class:`tokens.EndOfFile` tokens are not stored.
+
+    :param chunk: The part of the source to lex.
+    :param offset: Where the chunk starts in the source, added to the offsets of all tokens.
+    :param token_classes: Token classes of the parent's :py:class:`Scanner`, so the kinds agree.
+    :param keyword_classes: Keyword classes of the parent's :py:class:`Scanner`.
+    :return: The kinds, starts and ends arrays and whether the whole chunk was lexed.
+    """
+    scanner = compileScanner(token_classes, keyword_classes, not isinstance(chunk, str))
+    match = scanner.match
+    kindIds = scanner.kindIds
+    kinds, starts, ends = array("H"), array("q"), array("q")
+    cursor = 0
+    while True:
+        found = match(chunk, cursor)
+        if found is None:
+            return kinds.tobytes(), starts.tobytes(), ends.tobytes(), False
+        token_class, end = found
+        if token_class is EndOfFile:
+            return kinds.tobytes(), starts.tobytes(), ends.tobytes(), True
+        if token_class is not Space and token_class is not NewLine:
+            kinds.append(kindIds[token_class])
+            starts.append(offset + cursor)
+            ends.append(offset + end)
+        cursor = end
+
+
 class Lexer:
     """The Lexer class is responsible for, lexing, splitting up the input stream into tokens. Individual tokens
     are defined in :py:mod:`tokens`, the rules for which lexemes belong to tokens are defined in :py:mod:`grammar`.
 
+    Besides a string, the source can be any bytes-like object. :py:meth:`fromFile` uses this to lex a memory-mapped
+    file, so large scripts never have to be read into memory as a whole.
+
     :param cursor: Used to remember which part of the source was already lexed.
     :param source: The source code.
+    :param encoding: Encoding of a bytes-like source, None for a string source.
+    :param scanner: The compiled longest-match :py:class:`Scanner`, or a module generated by :py:mod:`lexgen`.
+    :param lines: The :py:class:`tokenstore.LineIndex` of the source, shared by all produced tokens.
+    :param mapping: The memory map backing :py:attr:`source`, if any. Released by :py:meth:`close`.
     """
 
-    def __init__(self, source: str):
-        """Lexer constructor, finds all tokens and creates a LUT.
+    def __init__(self, source: str | bytes | mmap.mmap, encoding: str = "utf-8", scanner: Scanner | None = None):
+        """Lexer constructor, prepares the scanner.
 
         :param source: The source code to be lexed.
+        :param encoding: Used to decode lexemes when the source is bytes-like.
+        :param scanner: A prepared scanner, such as :py:func:`lexgen.loadScanner`. By default a :py:class:`Scanner`
+                        is compiled for the classes returned by :py:func:`tokenClasses`.
+        :raises ValueError: The scanner can not match the type of the source.
         """
         self.cursor: int = 0
-        self.source: str = source
-        self.token_lexeme_pairs = [
-            (subclass.lexeme_pattern, subclass)
-            for subclass in Token.__subclasses__() + Literal.__subclasses__()
-            if subclass.__name__ != "Literal"
-        ]
+        self.source: str | bytes | mmap.mmap = source
+        self.encoding: str | None = None if isinstance(source, str) else encoding
+        self.mapping: mmap.mmap | None = None
+        self.lines = LineIndex(source)
+        if scanner is None:
+            scanner = compileScanner(*tokenClasses(), self.encoding is not None)
+        elif scanner.binary != (self.encoding is not None):
+            kind = "bytes" if scanner.binary else "strings"
+            raise ValueError(f"Scanner for {kind} can not lex a {type(source).__name__}")
+        self.scanner = scanner
         logger.info("Initialized Lexer")
 
+    @classmethod
+    def fromFile(cls, file: str | os.PathLike | BinaryIO, encoding: str = "utf-8") -> "Lexer":
+        """Create a lexer that scans a memory-mapped file directly.
+
+        Only the lexemes of produced tokens are decoded, so memory use does not grow with the size of the file.
+        File objects without a file descriptor are read into memory instead.
+
+        Example usage::
+
+            with Lexer.fromFile("script.lsf") as lexer:
+                Parser(lumerical_grammar, lexer).parse()
+
+        :param file: Path to the file or a file object opened in binary mode.
+        :param encoding: Encoding of the file.
+        :return: The lexer, call :py:meth:`close` or use it as a context manager to release the file.
+        """
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "rb") as handle:
+                return cls.fromFile(handle, encoding)
+
+        try:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # No file descriptor or an empty file, neither can be mapped.
+            lexer = cls(file.read(), encoding)
+        else:
+            lexer = cls(mapping, encoding)
+            lexer.mapping = mapping
+        logger.info(f"Lexing file {getattr(file, 'name', file)}")
+        return lexer
+
+    def close(self) -> None:
+        """Release the memory map created by :py:meth:`fromFile`."""
+        if self.mapping is not None:
+            self.mapping.close()
+            self.mapping = None
+
+    def __enter__(self) -> "Lexer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def advance(self) -> Token | None:
         """Advances and tries to math the next token from the remaining source. The longest lexeme matching a rule from :py:mod:`grammar`,
         is converted it's respectful token and it's lexeme is assigned.
 
         :return: Token if sucessfuly parsed, None when there are no more tokens to produce.
         """
-        longestMatch = None
-        longestMatchToken = None
-        for pair in self.token_lexeme_pairs:
-            pattern, expressionToken = pair
-            print(pair, self.source[self.cursor :], self.cursor)
-            regex = re.compile(pattern)
-            match = regex.match(self.source, self.cursor)
-            if match:
-                logger.debug(f"Matched {match.group(0)}")
-                if longestMatch is None or match.end(0) > longestMatch.end(0):
-                    logger.debug(f"So far longest match is {match.group(0)}")
-                    longestMatch = match
-                    token: Token = expressionToken()
-                    token.lexeme = longestMatch.group(0)
-                    longestMatchToken = token
-        if longestMatch is not None:
-            self.cursor = longestMatch.end(0)
-        if longestMatchToken:
-            logger.info(f"Advanced lexer with token {longestMatchToken} matching {longestMatchToken.lexeme}")
-        else:
+        match = self.scanner.match(self.source, self.cursor)
+        if match is None:
             logger.warning("Did not match any token")
-        return longestMatchToken
+            return None
+        token_class, end = match
+        token: Token = token_class()
+        token.lexeme = self.source[self.cursor : end]
+        if self.encoding is not None:
+            token.lexeme = token.lexeme.decode(self.encoding)
+        token.start = self.cursor
+        token.lines = self.lines
+        self.cursor = end
+        if logger.isEnabledFor(TRACE):
+            logger.log(TRACE, "Advanced lexer with token %s matching %r", token, token.lexeme)
+        return token
+
+    def scan(self) -> Generator[tuple[type[Token], int, int], None, None]:
+        """A generator that lexes the rest of the source without creating :py:class:`tokens.Token` instances.
+
+        Whitespace tokens are ignored. The generator stops after :py:class:`tokens.EndOfFile` or when no token
+        matches, :py:attr:`cursor` is kept up to date.
+
+        :return: Token class, start and end offset of every remaining token.
+        """
+        source = self.source
+        match = self.scanner.match
+        cursor = self.cursor
+        while True:
+            found = match(source, cursor)
+            if found is None:
+                logger.warning(f"Did not match any token at {cursor}")
+                return
+            token_class, end = found
+            self.cursor = end
+            if token_class is not Space and token_class is not NewLine:
+                yield token_class, cursor, end
+            if token_class is EndOfFile:
+                return
+            cursor = end
+
+    def tokenize(self) -> TokenStore:
+        """Lex the rest of the source into a compact :py:class:`tokenstore.TokenStore`.
+
+        No :py:class:`tokens.Token` instances are created, every token is stored as its kind and the offsets of
+        its lexeme. Whitespace tokens are ignored, like in :py:meth:`tokens`.
+
+        :return: All remaining tokens up to and including :py:class:`tokens.EndOfFile`.
+        """
+        kindIds = self.scanner.kindIds
+        store = TokenStore(self.source, self.scanner.kinds, self.encoding, self.lines)
+        append = store.append
+        for token_class, start, end in self.scan():
+            append(kindIds[token_class], start, end)
+        logger.info(f"Lexed {len(store)} tokens")
+        return store
+
+    def split(self, chunk_size: int) -> list[int]:
+        """Choose where to split the rest of the source for :py:meth:`tokenizeParallel`.
+
+        Chunks end right after a newline, so no token other than a string literal can cross the boundary.
+        A newline inside a string literal is skipped, quotes are counted to know whether a newline is inside one.
+        Escaped quotes are not counted.
+
+        :param chunk_size: Minimal length of a chunk, the last chunk may be shorter.
+        :return: Offsets of the chunk boundaries, starting with :py:attr:`cursor` and ending with the source length.
+        """
+        source = self.source
+        quote, escaped, newline = ('"', '\\"', "\n") if isinstance(source, str) else (b'"', b'\\"', b"\n")
+        boundaries = [self.cursor]
+        counted = self.cursor
+        inside = False
+        target = self.cursor + chunk_size
+        while target < len(source):
+            end = source.find(newline, target) + 1
+            if end == 0:
+                break
+            region = source[counted:end]
+            inside ^= (region.count(quote) - region.count(escaped)) % 2 == 1
+            counted = end
+            if inside:
+                target = end
+            else:
+                boundaries.append(end)
+                target = end + chunk_size
+        if boundaries[-1] < len(source) or len(boundaries) == 1:
+            boundaries.append(len(source))
+        return boundaries
+
+    def tokenizeParallel(self, workers: int | None = None, chunk_size: int = 1 << 20) -> TokenStore:
+        """Lex the rest of the source like :py:meth:`tokenize`, but split it into chunks lexed in worker processes.
+
+        The chunk boundaries are chosen by :py:meth:`split`, every chunk is lexed by :py:func:`lexChunk` on a
+        :py:class:`concurrent.futures.ProcessPoolExecutor` and the token arrays are concatenated in order.
+        Sources shorter than two chunks are lexed in this process. If a chunk can not be lexed to its end,
+        the whole source is lexed again with :py:meth:`tokenize`, so errors are reported at the same place.
+
+        :param workers: Number of worker processes, defaults to the number of processors.
+        :param chunk_size: Minimal length of a chunk in characters, or bytes for a bytes-like source.
+        :return: All remaining tokens up to and including :py:class:`tokens.EndOfFile`.
+        """
+        boundaries = self.split(chunk_size)
+        if len(boundaries) <= 2 or workers == 1:
+            return self.tokenize()
+
+        source = self.source
+        token_classes = tuple(self.scanner.classes)
+        keyword_classes = tuple(self.scanner.kinds[len(token_classes) :])
+        store = TokenStore(source, self.scanner.kinds, self.encoding, self.lines)
+        logger.info(f"Lexing {len(boundaries) - 1} chunks in parallel")
+        with ProcessPoolExecutor(workers) as executor:
+            results = executor.map(
+                lexChunk,
+                (source[start:end] for start, end in zip(boundaries, boundaries[1:])),
+                boundaries,
+                repeat(token_classes),
+                repeat(keyword_classes),
+            )
+            for kinds, starts, ends, complete in results:
+                if not complete:
+                    logger.warning("A chunk could not be lexed to its end, lexing sequentially")
+                    return self.tokenize()
+                store.kinds.frombytes(kinds)
+                store.starts.frombytes(starts)
+                store.ends.frombytes(ends)
+        store.append(self.scanner.kindIds[EndOfFile], len(source), len(source))
+        self.cursor = len(source)
+        logger.info(f"Lexed {len(store)} tokens")
+        return store
+
+    def edit(self, store: TokenStore, offset: int, deleted: int, inserted: str) -> TokenStore:
+        """Apply an edit to the source and update the tokens of the whole source without lexing all of it again.
+
+        Tokens ending before the edit are kept. Lexing restarts one token earlier than the first token touching the
+        edit, because a longest match may look past the end of its lexeme, or at the last string before the edit if
+        it ends in an escaped quote. It stops as soon as a token after the
+        edit lines up with a token of :py:attr:`store`, the remaining tokens are reused with shifted offsets.
+
+        :param store: Tokens of the whole current source, from :py:meth:`tokenize` or a previous edit.
+        :param offset: Where the edit starts.
+        :param deleted: Number of characters removed at :py:attr:`offset`.
+        :param inserted: Text inserted at :py:attr:`offset`.
+        :raises TypeError: The source is not a string, memory-mapped sources are read only.
+        :return: Tokens of the edited source.
+        """
+        if not isinstance(self.source, str):
+            raise TypeError("Only string sources can be edited")
+        self.source = self.source[:offset] + inserted + self.source[offset + deleted :]
+        self.lines = LineIndex(self.source)
+        shift = len(inserted) - deleted
+        edit_end = offset + len(inserted)
+
+        first = max(bisect_left(store.ends, offset) - 1, 0)
+        # A string ending in an escaped quote was matched up to the end of the source while looking for an unescaped
+        # one, so an edit anywhere after it can make it longer. Only the last string before the edit can be one.
+        quote = store.source.rfind('"', 0, store.starts[first]) if first < len(store) else -1
+        if quote >= 0:
+            string = bisect_right(store.starts, quote) - 1
+            if string >= 0 and store.kind(string) is String and store.lexeme(string).endswith('\\"'):
+                first = string
+        self.cursor = store.ends[first - 1] if first > 0 else 0
+
+        edited = TokenStore(self.source, store.classes, self.encoding, self.lines)
+        edited.kinds = store.kinds[:first]
+        edited.starts = store.starts[:first]
+        edited.ends = store.ends[:first]
+
+        kindIds = self.scanner.kindIds
+        for token_class, start, end in self.scan():
+            kind = kindIds[token_class]
+            if start >= edit_end:
+                old = bisect_left(store.starts, start - shift, first)
+                if (
+                    old < len(store)
+                    and store.starts[old] == start - shift
+                    and store.ends[old] == end - shift
+                    and store.kinds[old] == kind
+                ):
+                    logger.info(f"Relexed tokens {first} to {len(edited)}, reusing {len(store) - old} tokens")
+                    edited.kinds.extend(store.kinds[old:])
+                    if shift:
+                        edited.starts.extend(offset + shift for offset in store.starts[old:])
+                        edited.ends.extend(offset + shift for offset in store.ends[old:])
+                    else:
+                        edited.starts.extend(store.starts[old:])
+                        edited.ends.extend(store.ends[old:])
+                    self.cursor = edited.ends[-1]
+                    return edited
+            edited.append(kind, start, end)
+        logger.info(f"Relexed tokens {first} to {len(edited)}")
+        return edited
 
     def tokens(self) -> Generator[Token, None, None]:
         """A generator that returns the next token. Calls :py:meth:`advance` until it returns None.
 
-        Whitespace tokens are ignored.
+        Whitespace tokens are ignored. The generator stops after yielding :py:class:`tokens.EndOfFile`.
 
         :return: All tokens.
         """
         token = self.advance()
         while token:
-            if token == Space() or token == NewLine():
+            if isinstance(token, (Space, NewLine)):
                 token = self.advance()
                 continue
             yield token
+            if isinstance(token, EndOfFile):
+                return
             token = self.advance()
+
+
+class TokenStream:
+    """A persistent stream of tokens read from a single :py:meth:`Lexer.tokens` generator.
+
+    Tokens are kept in a lookahead buffer, so any number of tokens can be inspected with :py:meth:`peek`
+    before they are consumed. Positions can be remembered with :py:meth:`mark` and returned to with
+    :py:meth:`rewind`. Tokens behind the current position are dropped once no mark refers to them.
+
+    >>> stream = TokenStream(Lexer("x = 1;"))
+    >>> stream.peek(), stream.peek(1)
+    (Identifier(), Equal())
+
+    :param lexer: The lexer producing the tokens.
+    :param buffer: Tokens read from the lexer that were not dropped yet.
+    :param position: Index of the current token in :py:attr:`buffer`.
+    :param dropped: Number of tokens dropped from the front of :py:attr:`buffer`.
+    :param marks: Number of marks that were not released yet.
+    """
+
+    def __init__(self, lexer: Lexer):
+        """TokenStream constructor.
+
+        :param lexer: The lexer whose tokens are streamed.
+        """
+        self.lexer = lexer
+        self.generator = lexer.tokens()
+        self.buffer: list[Token] = []
+        self.position: int = 0
+        self.dropped: int = 0
+        self.marks: int = 0
+
+    def peek(self, k: int = 0) -> Token | None:
+        """Return the token :py:attr:`k` positions ahead of the current one without consuming anything.
+
+        :param k: How far to look ahead, 0 is the current token.
+        :return: The token, None when the lexer has no more tokens.
+        """
+        index = self.position + k
+        while index >= len(self.buffer):
+            token = next(self.generator, None)
+            if token is None:
+                return None
+            self.buffer.append(token)
+        return self.buffer[index]
+
+    def consume(self) -> Token | None:
+        """Return the current token and advance past it.
+
+        :return: The consumed token, None when the lexer has no more tokens.
+        """
+        token = self.peek()
+        if token is None:
+            return None
+        self.position += 1
+        if not self.marks and self.position > 32 and 2 * self.position > len(self.buffer):
+            del self.buffer[: self.position]
+            self.dropped += self.position
+            self.position = 0
+        return token
+
+    def advance(self) -> Token | None:
+        """Consume the current token and return the next one, like :py:meth:`consume` followed by :py:meth:`peek`.
+
+        :return: The new current token, None when the lexer has no more tokens.
+        """
+        buffer = self.buffer
+        position = self.position
+        if position >= len(buffer) and self.peek() is None:
+            return None
+        position += 1
+        if not self.marks and position > 32 and 2 * position > len(buffer):
+            del buffer[:position]
+            self.dropped += position
+            position = 0
+        self.position = position
+        if position < len(buffer):
+            return buffer[position]
+        return self.peek()
+
+    def mark(self) -> int:
+        """Remember the current position. Tokens are kept in the buffer until the mark is released.
+
+        :return: A marker to be passed to :py:meth:`rewind` and :py:meth:`release`.
+        """
+        self.marks += 1
+        return self.dropped + self.position
+
+    def rewind(self, marker: int) -> None:
+        """Return to a position remembered by :py:meth:`mark`. The mark stays active.
+
+        :param marker: The marker returned by :py:meth:`mark`.
+        """
+        self.position = marker - self.dropped
+
+    def release(self, marker: int) -> None:
+        """Release a mark, so tokens before it can be dropped.
+
+        :param marker: The marker returned by :py:meth:`mark`.
+        """
+        if self.marks == 0:
+            raise ValueError(f"Marker {marker} was already released")
+        self.marks -= 1
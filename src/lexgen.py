@@ -0,0 +1,296 @@
+import hashlib
+import importlib.util
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from tokens import Identifier, Keyword, Token
+from cache import cacheDirectory, writeAtomic
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+"""Version of the generated code, part of the cache key so a changed generator never loads a stale lexer."""
+
+MAX_FIRST_CHARACTERS = 256
+"""Patterns that can start with more characters than this are treated like patterns starting with any character."""
+
+
+def firstCharacters(pattern: str) -> tuple[frozenset[str] | None, bool]:
+    """Find the characters a lexeme matching :py:attr:`pattern` can start with.
+
+    The pattern is analysed with the parser of the :py:mod:`re` module. Constructs the analysis does not know,
+    like negated classes or lookarounds, make it give up and report that any character may start a lexeme.
+
+    :param pattern: A ``lexeme_pattern``.
+    :return: The first characters, None for any character, and whether the pattern can match an empty lexeme.
+    """
+    parsed = sre_parse.parse(pattern)
+    if parsed.state.flags & re.IGNORECASE:
+        return None, True
+    return firstOfSequence(list(parsed))
+
+
+def firstOfSequence(items: list) -> tuple[frozenset[str] | None, bool]:
+    """Find the first characters of a sequence of parsed regular expression items.
+
+    :param items: Items produced by the :py:mod:`re` parser.
+    :return: The first characters, None for any character, and whether the whole sequence can be empty.
+    """
+    characters: set[str] = set()
+    for op, argument in items:
+        first, nullable = firstOfItem(op.name, argument)
+        if first is None:
+            return None, True
+        characters |= first
+        if not nullable:
+            return frozenset(characters), False
+    return frozenset(characters), True
+
+
+def firstOfItem(op: str, argument) -> tuple[frozenset[str] | None, bool]:
+    """Find the first characters of a single parsed regular expression item.
+
+    :param op: Name of the item's opcode.
+    :param argument: The item's argument.
+    :return: The first characters, None for any character, and whether the item can be empty.
+    """
+    match op:
+        case "LITERAL":
+            return frozenset(chr(argument)), False
+        case "IN":
+            characters: set[str] = set()
+            for member, value in argument:
+                if member.name == "LITERAL":
+                    characters.add(chr(value))
+                elif member.name == "RANGE" and value[1] - value[0] < MAX_FIRST_CHARACTERS:
+                    characters.update(chr(code) for code in range(value[0], value[1] + 1))
+                else:
+                    return None, True
+            return frozenset(characters), False
+        case "BRANCH":
+            characters = set()
+            nullable = False
+            for branch in argument[1]:
+                first, empty = firstOfSequence(list(branch))
+                if first is None:
+                    return None, True
+                characters |= first
+                nullable = nullable or empty
+            return frozenset(characters), nullable
+        case "SUBPATTERN":
+            return firstOfSequence(list(argument[-1]))
+        case "MAX_REPEAT" | "MIN_REPEAT" | "POSSESSIVE_REPEAT":
+            first, nullable = firstOfSequence(list(argument[2]))
+            return first, nullable or argument[0] == 0
+        case "AT":
+            return frozenset(), True
+        case _:
+            return None, True
+
+
+def isEndOnly(pattern: str) -> bool:
+    """Whether the pattern only matches the empty lexeme at the end of the source, like :py:class:`tokens.EndOfFile`.
+
+    :param pattern: A ``lexeme_pattern``.
+    :return: True for ``\\Z``.
+    """
+    return [(op.name, str(argument)) for op, argument in sre_parse.parse(pattern)] == [("AT", "AT_END_STRING")]
+
+
+def literalOf(pattern: str) -> str | None:
+    """Return the only lexeme a pattern matches, if it matches exactly one fixed string.
+
+    :param pattern: A ``lexeme_pattern``.
+    :return: The lexeme, None if the pattern is not a plain literal.
+    """
+    items = list(sre_parse.parse(pattern))
+    if not items or any(op.name != "LITERAL" for op, _ in items):
+        return None
+    return "".join(chr(argument) for _, argument in items)
+
+
+def patternHash(token_classes: tuple[type[Token], ...], keyword_classes: tuple[type[Keyword], ...]) -> str:
+    """Hash the token classes and their ``lexeme_pattern``, in order. Used as the cache key of a generated lexer.
+
+    :param token_classes: Token classes in priority order.
+    :param keyword_classes: Keyword classes.
+    :return: Hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256(f"lexgen {VERSION}\n".encode())
+    for group in (token_classes, keyword_classes):
+        for token_class in group:
+            digest.update(f"{importName(token_class)} {token_class.lexeme_pattern!r}\n".encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def importName(token_class: type[Token]) -> str:
+    """Return the import path of a token class, the generated module imports every token class by it.
+
+    :param token_class: The token class.
+    :raises ValueError: The class can not be imported, it is defined in ``__main__`` or inside a function.
+    :return: Module and name separated by a dot.
+    """
+    if token_class.__module__ == "__main__" or "<locals>" in token_class.__qualname__:
+        raise ValueError(f"Token class {token_class.__qualname__} can not be imported by a generated lexer")
+    return f"{token_class.__module__}.{token_class.__qualname__}"
+
+
+def generate(token_classes: tuple[type[Token], ...], keyword_classes: tuple[type[Keyword], ...] = ()) -> str:
+    """Generate the source of a lexer module specialised for the given token classes.
+
+    The module dispatches on the first character of the lexeme. Only token classes whose pattern can start with
+    that character are tried, with the same longest-match rule as :py:class:`lex.Scanner`. A character that starts
+    a single fixed lexeme, like most operators, is matched without a regular expression.
+
+    The generated module has the interface of :py:class:`lex.Scanner`, ``match``, ``classes``, ``kinds``,
+    ``kindIds``, ``keywords`` and ``binary``. It matches string sources only.
+
+    :param token_classes: Token classes in priority order.
+    :param keyword_classes: Keyword classes resolved through the keyword table.
+    :raises ValueError: A ``lexeme_pattern`` contains a capturing group or a token class can not be imported.
+    :return: Python source code.
+    """
+    for token_class in token_classes:
+        if re.compile(token_class.lexeme_pattern).groups:
+            raise ValueError(f"Lexeme pattern of {token_class.__name__} must not contain capturing groups")
+    names = {token_class: f"t{kind}" for kind, token_class in enumerate(token_classes + keyword_classes)}
+    firsts = {token_class: firstCharacters(token_class.lexeme_pattern) for token_class in token_classes}
+    end_only = [token_class for token_class in token_classes if isEndOnly(token_class.lexeme_pattern)]
+    empty = [token_class for token_class in token_classes if re.match(token_class.lexeme_pattern, "")]
+
+    def candidates(character: str | None) -> tuple[type[Token], ...]:
+        return tuple(
+            token_class
+            for token_class in token_classes
+            if token_class not in end_only
+            and (
+                firsts[token_class][0] is None
+                or firsts[token_class][1]
+                or (character is not None and character in firsts[token_class][0])
+            )
+        )
+
+    def entry(group: tuple[type[Token], ...]) -> str:
+        if not group:
+            return "None"
+        if len(group) == 1:
+            literal = literalOf(group[0].lexeme_pattern)
+            if literal is not None:
+                return f"({names[group[0]]}, {literal!r}, None, None)"
+            return f"({names[group[0]]}, None, re.compile({group[0].lexeme_pattern!r}).match, None)"
+        pattern = "".join(
+            f"(?:(?=({token_class.lexeme_pattern})))?" for token_class in group
+        )
+        classes = ", ".join(names[token_class] for token_class in group)
+        return f"(None, None, re.compile({pattern!r}).match, ({classes},))"
+
+    characters = sorted(
+        set().union(*(first for first, _ in firsts.values() if first is not None))
+    )
+    default = candidates(None)
+    groups: dict[tuple[type[Token], ...], str] = {}
+    lines = [
+        f'"""Lexer generated by :py:mod:`lexgen` for {len(token_classes)} token classes, do not edit."""',
+        "import re",
+    ]
+    for token_class, name in names.items():
+        module, _, qualname = importName(token_class).rpartition(".")
+        lines.append(f"from {module} import {qualname} as {name}")
+    lines += [
+        "",
+        "binary = False",
+        f"classes = [{', '.join(names[token_class] for token_class in token_classes)}]",
+        f"kinds = classes + [{', '.join(names[token_class] for token_class in keyword_classes)}]",
+        "kindIds = {token_class: kind for kind, token_class in enumerate(kinds)}",
+        "keywords = {"
+        + ", ".join(f"{token_class.lexeme_pattern!r}: {names[token_class]}" for token_class in keyword_classes)
+        + "}",
+        f"identifier = {names.get(Identifier, 'None')}",
+        f"end = {names[empty[0]] if empty else 'None'}",
+        "",
+    ]
+    for group in [default] + [candidates(character) for character in characters]:
+        if group not in groups:
+            groups[group] = f"g{len(groups)}"
+            lines.append(f"{groups[group]} = {entry(group)}")
+    lines += [
+        "",
+        f"default = {groups[default]}",
+        "dispatch = {",
+        *(
+            f"    {character!r}: {groups[candidates(character)]},"
+            for character in characters
+            if candidates(character) != default
+        ),
+        "}",
+        "",
+        "",
+        "def match(source, position):",
+        "    if position >= len(source):",
+        "        return None if end is None else (end, position)",
+        "    entry = dispatch.get(source[position], default)",
+        "    if entry is None:",
+        "        return None",
+        "    token_class, literal, regex, group_classes = entry",
+        "    if literal is not None:",
+        "        if len(literal) > 1 and not source.startswith(literal, position):",
+        "            return None",
+        "        return token_class, position + len(literal)",
+        "    if group_classes is None:",
+        "        found = regex(source, position)",
+        "        if found is None:",
+        "            return None",
+        "        stop = found.end()",
+        "    else:",
+        "        spans = regex(source, position).regs",
+        "        longest = max(spans[1:])",
+        "        if longest[0] < 0:",
+        "            return None",
+        "        token_class = group_classes[spans.index(longest, 1) - 1]",
+        "        stop = longest[1]",
+        "    if token_class is identifier:",
+        "        token_class = keywords.get(source[position:stop], token_class)",
+        "    return token_class, stop",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=None)
+def loadScanner(
+    token_classes: tuple[type[Token], ...],
+    keyword_classes: tuple[type[Keyword], ...] = (),
+    directory: Path | None = None,
+) -> ModuleType:
+    """Load the generated lexer for the given token classes, generating it first if it is not cached yet.
+
+    Generated modules are stored in :py:func:`cache.cacheDirectory` under a name derived from
+    :py:func:`patternHash`, so a changed ``lexeme_pattern`` or token order produces a new module.
+
+    Example usage::
+
+        lexer = Lexer(source, scanner=loadScanner(*tokenClasses()))
+
+    :param token_classes: Token classes in priority order.
+    :param keyword_classes: Keyword classes resolved through the keyword table.
+    :param directory: Where to cache the module, defaults to :py:func:`cache.cacheDirectory`.
+    :return: The generated module, usable in place of a :py:class:`lex.Scanner`.
+    """
+    name = f"lexer_{patternHash(token_classes, keyword_classes)[:32]}"
+    path = Path(directory if directory is not None else cacheDirectory()) / f"{name}.py"
+    if not path.exists():
+        logger.info(f"Generating lexer {path}")
+        writeAtomic(path, generate(token_classes, keyword_classes).encode())
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    logger.info(f"Loaded generated lexer {path}")
+    return module
@@ -1,10 +1,90 @@
 from grammar import Grammar, Production
-from symbol import Epsilon, NonTerminal, Terminal
-from copy import deepcopy
+from symbol import Action, Epsilon, NonTerminal, Terminal
+from cache import cacheDirectory, writeAtomic
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from stack import Stack
+from tracing import TRACE
+from typing import Callable
+import ast
+import hashlib
+import logging
+import pickle
 import pprint
 
 from tokens import Token
 
+NONTERMINAL = 0
+"""Tag of an expansion entry holding the id of a :py:class:`NonTerminal`."""
+TERMINAL = 1
+"""Tag of an expansion entry holding the token class of a :py:class:`Terminal`."""
+ACTION = 2
+"""Tag of an expansion entry holding the id of an :py:class:`Action`, its index in :py:attr:`LLTable.actions`."""
+
+CACHE_VERSION = 3
+"""Version of the cached sets, part of :py:meth:`LLTable.Hash` so a changed format is never loaded."""
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Conflict:
+    """Two productions of a nonterminal whose SELECT sets share a terminal, found by :py:meth:`LLTable.BuildTable`.
+
+    :param nonTerminal: The left-hand side of both productions.
+    :param terminal: The terminal in both SELECT sets.
+    :param overwritten: The earlier production, replaced in the table.
+    :param chosen: The later production, predicted for :py:attr:`terminal`.
+    """
+
+    nonTerminal: NonTerminal
+    terminal: Terminal
+    overwritten: Production
+    chosen: Production
+
+
+def propagate(sets: dict[NonTerminal, int], edges: dict[NonTerminal, set[NonTerminal]]) -> None:
+    """Grow bitsets along edges until every set contains the sets of all nonterminals with an edge to it.
+
+    A worklist holds the nonterminals whose set grew, only their edges are followed again, so every edge is
+    visited once per change of its source instead of once per round over the whole grammar.
+
+    :param sets: Bitset of every nonterminal, updated in place.
+    :param edges: The nonterminals whose sets include the set of a nonterminal.
+    """
+    worklist = deque(nonTerminal for nonTerminal, bits in sets.items() if bits)
+    queued = set(worklist)
+    while worklist:
+        source = worklist.popleft()
+        queued.discard(source)
+        bits = sets[source]
+        for target in edges[source]:
+            grown = sets[target] | bits
+            if grown != sets[target]:
+                sets[target] = grown
+                if target not in queued:
+                    queued.add(target)
+                    worklist.append(target)
+
+
+def describeSymbol(symbol: NonTerminal | Terminal | Action) -> str:
+    """Describe a symbol of a right-hand side for :py:meth:`LLTable.Hash`, actions include their parameters.
+
+    :param symbol: The symbol.
+    :return: A description that does not change between runs.
+    """
+    if isinstance(symbol, NonTerminal):
+        return f"<{symbol}>"
+    name = f"{type(symbol).__module__}.{type(symbol).__qualname__}"
+    if isinstance(symbol, Action):
+        parameters = ", ".join(
+            f"{key}={ast.dump(value) if isinstance(value, ast.AST) else repr(value)}"
+            for key, value in sorted(vars(symbol).items())
+        )
+        return f"{name}({parameters})"
+    return name
+
 
 class LLTable:
     def __init__(self, grammar: Grammar) -> None:
@@ -16,23 +96,67 @@ class LLTable:
         self.firstSets = {}
         self.followSets = {}
         self.selectSets = {}
+        self.nonTerminals: list[NonTerminal] = []
+        self.nonTerminalIds: dict[NonTerminal, int] = {}
+        self.terminalIds: dict[type[Token], int] = {}
+        self.width = 0
+        self.productions: list[Production | None] = [None]
+        self.expansions: list[tuple[tuple[int, int | type[Token]], ...]] = [()]
+        self.actions: list[Action] = []
+        self.actionIds: dict[int, int] = {}
+        self.calls: tuple[Callable[[Stack, Stack], object], ...] = ()
+        self.table: dict[NonTerminal, dict[Terminal, Production]] = {}
+        self.conflicts: list[Conflict] = []
+        self.base: list[int] = []
+        self.check: list[int] = []
+        self.next: list[int] = []
+        self.digest: str | None = None
+        self.operatorTables: dict = {}  # Filled by precedence.OperatorTable.fromTable, by expression nonterminal
+
+    def TerminalBits(self) -> dict[Terminal, int]:
+        """Assign a bit to every terminal of the grammar, in the order of their names.
+
+        :return: The bit of every terminal.
+        """
+        return {terminal: 1 << bit for bit, terminal in enumerate(sorted(self.grammar.terminals(), key=str))}
+
+    def TerminalSet(self, bits: int, terminalBits: dict[Terminal, int]) -> set[Terminal]:
+        """Convert a bitset back to a set of terminals.
+
+        :param bits: The bitset.
+        :param terminalBits: The bit of every terminal, see :py:meth:`TerminalBits`.
+        :return: The terminals whose bit is set.
+        """
+        return {terminal for terminal, bit in terminalBits.items() if bits & bit}
 
     def ComputeFirstSets(self):
         """Generate first sets for all the :py:class:`NonTerminal` s.
-        Calls :py:meth:`FirstClosure` for every production.
-        """
-        self.firstSets = {prod.LHS: set() for prod in self.grammar.productions}
 
-        previousFirstSets = deepcopy(self.firstSets)
-        while True:
-            for production in self.grammar.productions:
-                self.FirstClosure(production)
-            if previousFirstSets == self.firstSets:
-                break
-            previousFirstSets = deepcopy(self.firstSets)
+        Every production contributes to the FIRST set of its LHS as described in :py:meth:`FirstClosure`. Its
+        leading terminal is added right away, and every nonterminal it can start with becomes an edge to the LHS.
+        The sets are integer bitsets over :py:meth:`TerminalBits` and are grown along the edges by
+        :py:func:`propagate`, which gives the same sets as applying :py:meth:`FirstClosure` until nothing changes.
+        """
+        terminalBits = self.TerminalBits()
+        first = {prod.LHS: 0 for prod in self.grammar.productions}
+        nullables = self.grammar.nullable_nonterminals
+        edges: dict[NonTerminal, set[NonTerminal]] = {nonTerminal: set() for nonTerminal in first}
+        for production in self.grammar.productions:
+            if isinstance(production.RHS_clean, Epsilon):
+                continue
+            for symbol in production.RHS_clean:
+                if isinstance(symbol, Terminal):
+                    first[production.LHS] |= terminalBits[symbol]
+                    break
+                edges[symbol].add(production.LHS)
+                if symbol not in nullables:
+                    break
+        propagate(first, edges)
+        self.firstSets = {nonTerminal: self.TerminalSet(bits, terminalBits) for nonTerminal, bits in first.items()}
 
-        for v, k in self.firstSets.items():
-            print(v, k)
+        if logger.isEnabledFor(logging.DEBUG):
+            for nonTerminal, first in self.firstSets.items():
+                logger.debug("FIRST(%s) = %s", nonTerminal, first)
 
     def FirstClosure(self, production: Production) -> None:
         """The first set for the production is found by applying the follwing rule to a production in the form of
@@ -64,17 +188,36 @@ class LLTable:
 
     def ComputeFolowSets(self):
         """Generate follow sets for all the :py:class:`NonTerminal`s. Called after :py:meth:`ComputeFirstSets`.
-        Calls :py:meth:`FirstClosure` for every production.
-        """
-        self.followSets = {prod.LHS: set() for prod in self.grammar.productions}
-        previousFollowSets = deepcopy(self.followSets)
 
-        while True:
-            for production in self.grammar.productions:
-                self.FollowClosure(production)
-            if previousFollowSets == self.followSets:
-                break
-            previousFollowSets = deepcopy(self.followSets)
+        The first rule of :py:meth:`FollowClosure` only adds FIRST sets and terminals, which are known, so it is
+        applied once. The second rule makes FOLLOW(:math:`lhs`) an edge to every nonterminal it applies to, and the
+        bitsets are grown along those edges by :py:func:`propagate`, like for :py:meth:`ComputeFirstSets`.
+        """
+        terminalBits = self.TerminalBits()
+        firstBits = {
+            nonTerminal: sum(terminalBits[terminal] for terminal in first)
+            for nonTerminal, first in self.firstSets.items()
+        }
+        follow = {prod.LHS: 0 for prod in self.grammar.productions}
+        nullables = self.grammar.nullable_nonterminals
+        edges: dict[NonTerminal, set[NonTerminal]] = {nonTerminal: set() for nonTerminal in follow}
+        for production in self.grammar.productions:
+            if isinstance(production.RHS_clean, Epsilon):
+                continue
+            for symbol, next_symbol in zip(production.RHS_clean, production.RHS_clean[1:]):
+                if isinstance(symbol, NonTerminal):
+                    if isinstance(next_symbol, Terminal):
+                        follow[symbol] |= terminalBits[next_symbol]
+                    elif isinstance(next_symbol, NonTerminal):
+                        follow[symbol] |= firstBits[next_symbol]
+            for symbol in reversed(production.RHS_clean):
+                if isinstance(symbol, Terminal):
+                    break
+                edges[production.LHS].add(symbol)
+                if symbol not in nullables:
+                    break
+        propagate(follow, edges)
+        self.followSets = {nonTerminal: self.TerminalSet(bits, terminalBits) for nonTerminal, bits in follow.items()}
 
     def FollowClosure(self, production: Production) -> None:
         """The follow set for the production is found with the following steps for any production in the form of
@@ -96,7 +239,6 @@ class LLTable:
         :param production: Production who's first set will be computed and added to :py:attr:`firstSets`.
         """
         if isinstance(production.RHS_clean, Epsilon):
-            print("Epsion prod", production)
             return
         # First rule application
         for i, symbol in enumerate(production.RHS_clean[:-1]):
@@ -110,7 +252,10 @@ class LLTable:
                 continue
         # Second rule application
         last_nonterminal: None | NonTerminal = None
-        print("Rule", production.LHS, production.RHS_clean, self.followSets[production.LHS])
+        if logger.isEnabledFor(TRACE):
+            logger.log(
+                TRACE, "Rule %s -> %s, FOLLOW %s", production.LHS, production.RHS_clean, self.followSets[production.LHS]
+            )
         for symbol in reversed(production.RHS_clean):
             if isinstance(symbol, NonTerminal):
                 last_nonterminal = symbol
@@ -121,7 +266,8 @@ class LLTable:
             elif isinstance(symbol, Terminal):
                 break
         if last_nonterminal is not None:
-            print("---ADDING", self.followSets[production.LHS], "to", last_nonterminal)
+            if logger.isEnabledFor(TRACE):
+                logger.log(TRACE, "Adding %s to FOLLOW(%s)", self.followSets[production.LHS], last_nonterminal)
             self.followSets[last_nonterminal] |= self.followSets[production.LHS]
 
     def ComputeSelectSets(self):
@@ -158,9 +304,9 @@ class LLTable:
                 else:
                     selectSets[production.number] |= {symbol}
                     break
-        print("Select sets")
-        for k, v in selectSets.items():
-            print(k, v)
+        if logger.isEnabledFor(logging.DEBUG):
+            for number, select in selectSets.items():
+                logger.debug("SELECT(%s) = %s", number, select)
         self.selectSets = selectSets
 
     def Predict(self, currentState: NonTerminal, token: Token) -> Production | None:
@@ -172,28 +318,227 @@ class LLTable:
         :return: Return a valid :py:class:`Token` or None.
         """
 
-        return self.table[currentState][token]
+        return self.productions[self.PredictId(self.nonTerminalIds[currentState], token)]
+
+    def PredictId(self, row: int, token: Token) -> int:
+        """The compiled form of :py:meth:`Predict`, see :py:meth:`Prediction`.
+
+        :param row: Id of the current :py:class:`NonTerminal`, from :py:attr:`nonTerminalIds`.
+        :param token: The current input :py:class:`Token`.
+        :return: Id of the production in :py:attr:`productions`, 0 if the token is invalid in this state.
+        """
+        return self.Prediction(row, self.terminalIds.get(type(token), self.width - 1))
+
+    def Prediction(self, row: int, column: int) -> int:
+        """Look up an entry of the compressed table, see :py:meth:`Compile`.
+
+        :param row: Id of a :py:class:`NonTerminal`, from :py:attr:`nonTerminalIds`.
+        :param column: Id of a terminal, from :py:attr:`terminalIds`, or ``width - 1`` for an unknown token.
+        :return: Id of the production in :py:attr:`productions`, 0 if the terminal is invalid for the nonterminal.
+        """
+        index = self.base[row] + column
+        return self.next[index] if self.check[index] == row else 0
+
+    @property
+    def predictions(self) -> list[int]:
+        """The table uncompressed, with the production id for row ``row`` and column ``column`` at
+        ``row * width + column``. Built on every access, the parsers use :py:meth:`Prediction`.
+
+        :return: Production id of every nonterminal and terminal, 0 for errors.
+        """
+        return [self.Prediction(row, column) for row in range(len(self.nonTerminals)) for column in range(self.width)]
 
     def ComputeTable(self):
         """
         Computes the LL table from the SELECT sets for each terminal and nonterminal.
 
         :py:meth:`ComputeFirstSets`, :py:meth:`ComputeFollowSets` and :py:meth:`ComputeSelectSets` are called first.
+        Every conflict found by :py:meth:`BuildTable` is logged as a warning, only here, a table loaded by
+        :py:meth:`Cached` was computed and reported before.
         """
         self.ComputeFirstSets()
         self.ComputeFolowSets()
         self.ComputeSelectSets()
-        print("Selectt\n", self.selectSets)
-        table = {
-            prod.LHS: {token: None for token in self.grammar.terminals()}
-            for prod in self.grammar.productions
-        }
+        self.BuildTable()
+        for conflict in self.conflicts:
+            logger.warning(
+                f"Grammar is not LL(1), {conflict.nonTerminal} on {conflict.terminal}: "
+                f"production {conflict.chosen.number} replaces {conflict.overwritten.number}"
+            )
+
+    def BuildTable(self):
+        """Fill :py:attr:`table` from the SELECT sets and compile it with :py:meth:`Compile`.
+
+        Every row of :py:attr:`table` holds only the terminals some production of its nonterminal is selected by.
+        When the SELECT sets of two productions of a nonterminal share a terminal, the grammar is not LL(1). The
+        later production is kept and the pair is recorded in :py:attr:`conflicts`.
+        """
+        table: dict[NonTerminal, dict[Terminal, Production]] = {prod.LHS: {} for prod in self.grammar.productions}
+        conflicts: list[Conflict] = []
         for production in self.grammar.productions:
+            row = table[production.LHS]
             for token in self.selectSets[production.number]:
-                table[production.LHS][token] = production
+                if token in row:
+                    conflicts.append(Conflict(production.LHS, token, row[token], production))
+                row[token] = production
         self.table = table
-        pp = pprint.PrettyPrinter(depth=2)
-        pp.pprint(table)
+        self.conflicts = conflicts
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("LL table\n%s", pprint.pformat(table, depth=2))
+        self.Compile()
+
+    def Compile(self):
+        """Compile :py:attr:`table` into a dense form indexed by small integers, used by :py:meth:`PredictId`.
+
+        Nonterminals are numbered in the order of their first production, terminals are numbered by their token
+        class and productions by their position in the grammar, starting at 1. Id 0 marks an error, the last column
+        is for tokens that do not appear in the grammar and is always an error.
+
+        Most entries of the table are errors, so the rows are stored comb-compressed. Every row is placed at an
+        offset :py:attr:`base` ``[row]`` into the shared :py:attr:`next` list, such that its entries only fall into
+        free slots. :py:attr:`check` holds the row owning every slot, so the production for ``row`` and
+        ``column`` is ``next[base[row] + column]`` if ``check[base[row] + column] == row`` and 0 otherwise, see
+        :py:meth:`Prediction`. Rows are placed densest first, each at the first offset where it fits.
+
+        The right-hand side of every production is precompiled into :py:attr:`expansions`, reversed, ready to be
+        pushed on the parser stack. Every symbol becomes a pair of a tag and a value, :py:data:`NONTERMINAL` with the
+        id of a :py:class:`NonTerminal`, :py:data:`TERMINAL` with the token class of a :py:class:`Terminal` or
+        :py:data:`ACTION` with the id of an :py:class:`Action`.
+
+        Actions are numbered in the order they first appear in the grammar, an action object used by several
+        productions has a single id. :py:attr:`calls` holds the bound ``call`` method of every action by id, so the
+        parser runs an action with a single index and call.
+        """
+        self.nonTerminals = list(dict.fromkeys(prod.LHS for prod in self.grammar.productions))
+        self.nonTerminalIds = {nonTerminal: row for row, nonTerminal in enumerate(self.nonTerminals)}
+        terminals = sorted(self.grammar.terminals(), key=str)
+        self.terminalIds = {type(terminal): column for column, terminal in enumerate(terminals)}
+        self.width = len(terminals) + 1
+
+        self.productions = [None, *self.grammar.productions]
+        self.actions = list(
+            {
+                id(symbol): symbol
+                for production in self.grammar.productions
+                if not isinstance(production.RHS, Epsilon)
+                for symbol in production.RHS
+                if isinstance(symbol, Action)
+            }.values()
+        )
+        self.actionIds = {id(action): number for number, action in enumerate(self.actions)}
+        self.calls = tuple(action.call for action in self.actions)
+        self.expansions = [()]
+        for production in self.grammar.productions:
+            if isinstance(production.RHS, Epsilon):
+                self.expansions.append(())
+                continue
+            self.expansions.append(tuple(self.Tag(symbol) for symbol in reversed(production.RHS)))
+
+        productionIds = {production: number for number, production in enumerate(self.productions) if number}
+        rows = {
+            self.nonTerminalIds[nonTerminal]: {
+                self.terminalIds[type(terminal)]: productionIds[production] for terminal, production in row.items()
+            }
+            for nonTerminal, row in self.table.items()
+        }
+        base = [0] * len(self.nonTerminals)
+        check: list[int] = []
+        targets: list[int] = []
+        free = 0  # First slot that may still be free
+        for row, entries in sorted(rows.items(), key=lambda item: -len(item[1])):
+            if not entries:
+                continue
+            offset = max(free - min(entries), 0)
+            while any(offset + column < len(check) and check[offset + column] != -1 for column in entries):
+                offset += 1
+            size = offset + self.width
+            check.extend([-1] * (size - len(check)))
+            targets.extend([0] * (size - len(targets)))
+            for column, production in entries.items():
+                check[offset + column] = row
+                targets[offset + column] = production
+            base[row] = offset
+            while free < len(check) and check[free] != -1:
+                free += 1
+        if not check:
+            check, targets = [-1] * self.width, [0] * self.width
+        self.base, self.check, self.next = base, check, targets
+        logger.debug(f"Compressed LL table of {len(base) * self.width} entries into {len(targets)}")
+
+    def Hash(self) -> str:
+        """Hash the structure of the grammar, used as the key of the table cache.
+
+        Every production contributes its left-hand side and its right-hand side including the actions and their
+        parameters, in grammar order. Nullability is derived from those, so it is not hashed.
+
+        The digest is computed once per table and kept in :py:attr:`digest`.
+
+        :return: Hexadecimal SHA-256 digest.
+        """
+        if self.digest is not None:
+            return self.digest
+        digest = hashlib.sha256(f"lltable {CACHE_VERSION}\n".encode())
+        for production in self.grammar.productions:
+            if isinstance(production.RHS, Epsilon):
+                rhs = "Epsilon"
+            else:
+                rhs = " ".join(describeSymbol(symbol) for symbol in production.RHS)
+            digest.update(f"{production.LHS} -> {rhs}\n".encode())
+        self.digest = digest.hexdigest()
+        return self.digest
+
+    @classmethod
+    def Cached(cls, grammar: Grammar, directory: Path | None = None) -> "LLTable":
+        """Return the computed LL table of a grammar, reusing the FIRST, FOLLOW and SELECT sets of an earlier run.
+
+        The sets are stored in :py:func:`cache.cacheDirectory` under the :py:meth:`Hash` of the grammar, any change
+        to a production or an action computes them again. Only :py:meth:`BuildTable` runs when they are cached.
+
+        :param grammar: LL(1) grammar.
+        :param directory: Where to cache the sets, defaults to :py:func:`cache.cacheDirectory`.
+        :return: The table, ready for :py:meth:`Predict`.
+        """
+        table = cls(grammar)
+        path = Path(directory if directory is not None else cacheDirectory()) / f"lltable_{table.Hash()[:32]}.pickle"
+        try:
+            with open(path, "rb") as file:
+                cached = pickle.load(file)
+            table.firstSets = cached["first"]
+            table.followSets = cached["follow"]
+            selectSets = zip(grammar.productions, cached["select"], strict=True)
+            table.selectSets = {production.number: select for production, select in selectSets}
+        except FileNotFoundError:
+            logger.info(f"Computing LL table, no cache at {path}")
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError, ValueError) as error:
+            logger.warning(f"Computing LL table, cannot load cache {path}: {error!r}")
+        else:
+            logger.info(f"Loaded LL table cache {path}")
+            table.BuildTable()
+            return table
+
+        table.ComputeTable()
+        cached = {
+            "first": table.firstSets,
+            "follow": table.followSets,
+            "select": [table.selectSets[production.number] for production in grammar.productions],
+        }
+        writeAtomic(path, pickle.dumps(cached, protocol=pickle.HIGHEST_PROTOCOL))
+        return table
+
+    def Tag(self, symbol: NonTerminal | Terminal | Action) -> tuple[int, int | type[Token]]:
+        """Convert a symbol of a right-hand side into a tagged entry of :py:attr:`expansions`.
+
+        :param symbol: The symbol.
+        :raises TypeError: The symbol is not a :py:class:`NonTerminal`, :py:class:`Terminal` or :py:class:`Action`.
+        :return: The tag and the value.
+        """
+        if isinstance(symbol, NonTerminal):
+            return NONTERMINAL, self.nonTerminalIds[symbol]
+        if isinstance(symbol, Terminal):
+            return TERMINAL, type(symbol)
+        if isinstance(symbol, Action):
+            return ACTION, self.actionIds[id(symbol)]
+        raise TypeError(f"Wrong type of object found in a production, {symbol.__class__}")
 
     def __repr__(self) -> str:
         """Return a csv representation of the LL table.
@@ -212,7 +557,7 @@ class LLTable:
             ):
                 csv_string += (
                     str(self.table[row][token].number)
-                    if self.table[row][token] is not None
+                    if token in self.table.get(row, {})
                     else " "
                 ) + ","
             csv_string += "\n"
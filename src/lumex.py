@@ -1,6 +1,4 @@
-from lex import Lexer
-from parse import Parser
-from lumerical_grammar import lumerical_grammar
+from transpiler import Transpiler
 import logging
 import ast
 
@@ -30,22 +28,20 @@ def main():
     # lexer = Lexer('addfdtd;\naddrect;\naddrect;\nset("name", "block");\nset("x", 5);\nset("x span", 7);\nset("z span", 11);')
     # lexer = Lexer('addfdtd;\naddrect;\naddrect;\nset("name", "block");\nset("x", 5);\nset("x span", 7);\nselectall;\nset("z span", 11);')
     # lexer = Lexer('addfdtd;\naddrect;\naddrect;\nset("name", "block");\nset("x", 5);\nset("x span", 7);\nshiftselect("Rectangle");\nset("z span", 11);\nselect("block");\nset("z", 2+2);')
-    lexer = Lexer('addfdtd;\naddrect;\naddrect;\nset("name", "block");\nset("x", 5);\nset("x span", 7);\nshiftselect("Rectangle");\nset("z span", 11);\nselect("block");\nset("z", 2+2);run;')
+    source = 'addfdtd;\naddrect;\naddrect;\nset("name", "block");\nset("x", 5);\nset("x span", 7);\nshiftselect("Rectangle");\nset("z span", 11);\nselect("block");\nset("z", 2+2);run;'
     # lexer = Lexer('addfdtd;\naddplane;\nset("frequency", 1e9)')
     # lexer = Lexer('addfdtd;\nset("dimension", 2);')
     # lexer = Lexer('addfdtd;\nset("x span", 7);')
 
 
-    parser = Parser(lumerical_grammar, lexer)
-    parser.parse()
-    tree = parser.valueStack.get()
-    tree = ast.fix_missing_locations(tree) 
+    transpiler = Transpiler()
+    tree = transpiler.transpile(source, unparse=False)
     logger.info("Python AST dump\n" + ast.dump(tree, indent=4) + "\n")
-    logger.info("Lumerical source\n" + lexer.source + "\n")
-    logger.info("Transpiled Python\n" + ast.unparse(ast.fix_missing_locations(tree)) + "\n")
+    logger.info("Lumerical source\n" + source + "\n")
+    logger.info("Transpiled Python\n" + ast.unparse(tree) + "\n")
 
     logger.info("SUCCESS LUMEX")
-    print(ast.unparse(ast.fix_missing_locations(tree)))
+    print(ast.unparse(tree))
 
 
 if __name__ == "__main__":
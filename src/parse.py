@@ -1,104 +1,332 @@
-from queue import LifoQueue
-from collections import deque
-from typing import Deque
-from lltable import LLTable
-from symbol import Epsilon, NonTerminal, Terminal
-from lex import Lexer
+from dataclasses import dataclass
+from typing import Callable
+from lltable import NONTERMINAL, TERMINAL, LLTable
+from symbol import NonTerminal
+from lex import Lexer, TokenStream
 from grammar import Grammar
 from symtable import SymbolTable
-from tokens import EndOfFile, Token
-from symbol import Action
+from tokens import EndOfFile, RightCurly, Semicolon, Token
+from stack import Stack
+from emit import RecordingBody, StreamingBody
+from precedence import ExpressionParser, OperatorTable
 from ast import AST, Module
+from tracing import TRACE
+from profiling import ActionProfile
 import logging
+import rdgen
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class Diagnostic:
+    """A syntax error collected by a :py:class:`Parser` that recovers from errors.
+
+    :param message: The message the parser would raise without recovery.
+    :param line: Line of the offending token, None when the lexer failed.
+    :param column: Column of the offending token, None when the lexer failed.
+    """
+
+    message: str
+    line: int | None
+    column: int | None
+
+
 class Parser:
     """The :py:class:`Parser` class handles the entire parsing process. Top-down parsing is handled by the provided LL table.
 
     :param grammar: The grammar according to which the LL table is constructed.
     :param lexer: The lexer provides a stream of tokens to be processed.
     :param table: The LL table.
-    :param stack: The stack holds Terminals and NonTerminals, they are added and removed in a FIFO order. They guide the order of the parsing process.
+    :param stack: The stack holds Terminals, NonTerminals and Actions, they are added and removed in a FIFO order. They guide the order of the parsing process. Symbols are held as the tagged entries of :py:attr:`LLTable.expansions`.
     :param valueStack: The valueStack holds AST nodes, that have been encountered and will be consumed by actions at a later point.
     :param tokenStack: The tokenStack holds already accepted tokens so they can be used in actions.
-    :param ast: Stores the abstract syntax tree, used for resulting code generation.
-    :param current_token: The current input token, call next(Lexer.tokens()) to update. 
+    :param tokens: The :py:class:`lex.TokenStream` read by the parser for the whole parse.
+    :param current_token: The current input token, equal to :py:meth:`lex.TokenStream.peek`.
+    :param generated: Whether :py:meth:`parse` runs the recursive-descent parser generated by :py:mod:`rdgen`.
+    :param recover: Whether syntax errors are collected in :py:attr:`diagnostics` instead of raised.
+    :param diagnostics: Syntax errors found so far, in input order.
+    :param errorToken: The token at which the last diagnostic was recorded.
+    :param expressions: Parses the expressions by precedence climbing, None if they are expanded by the table.
+    :param calls: The callable of every action, by action id, see :py:attr:`LLTable.calls`.
     """
 
-    def __init__(self, grammar: Grammar, lexer: Lexer) -> None:
+    def __init__(
+        self,
+        grammar: Grammar,
+        lexer: Lexer,
+        generated: bool = False,
+        recover: bool = False,
+        table: LLTable | None = None,
+        sink: Callable[[str], object] | None = None,
+        record: bool = False,
+        start: str = "root",
+        precedence: bool = True,
+        profile: ActionProfile | None = None,
+    ) -> None:
         """The :py:class:`Parser` constructor.
 
         :param grammar: The grammar according to which the input should be parsed.
         :param lexer: The :py:class:`Lexer` provides the stream of tokens to be parsed.
+        :param generated: Parse with the recursive-descent parser generated from the grammar instead of the table.
+        :param recover: Collect all syntax errors in one pass, see :py:meth:`recoverNonTerminal`.
+        :param table: The LL table of the grammar, loaded with :py:meth:`LLTable.Cached` if not given.
+        :param sink: Stream the code of every top-level statement to this callable instead of keeping the tree,
+            see :py:class:`emit.StreamingBody`.
+        :param record: Record the span and nodes of every top-level statement, see :py:class:`emit.RecordingBody`.
+        :param start: Name of the nonterminal to parse, the whole program by default.
+        :param precedence: Parse expressions with an :py:class:`precedence.ExpressionParser`, if the grammar has them.
+        :param profile: Count the calls of every action and the time spent in them.
+        :raises ValueError: Both :py:attr:`generated` and :py:attr:`recover`, or :py:attr:`sink` and
+            :py:attr:`record` are set.
         """
+        if generated and recover:
+            raise ValueError("Error recovery is only supported by the table-driven parser")
+        if sink is not None and record:
+            raise ValueError("Streamed statements can not be recorded")
         self.grammar = grammar
         self.lexer = lexer
-        self.table = LLTable(self.grammar)
-        self.table.ComputeTable()
-        self.stack: LifoQueue[Terminal | NonTerminal | Action] = LifoQueue()
-        self.valueStack: LifoQueue[AST] = LifoQueue()       # Stack for ast nodes
-        self.valueStack.put(Module())
-        self.tokenStack: LifoQueue[Token] = LifoQueue()     # Stack for tokens as input for actions
-        self.ast = Module()
-        self.stack.put(NonTerminal("root"))     # Stack for ll parsing
+        self.generated = generated
+        self.recover = recover
+        self.diagnostics: list[Diagnostic] = []
+        self.errorToken: Token | None = None
+        self.table = table if table is not None else LLTable.Cached(self.grammar)
+        self.stack: list[tuple[int, int | type[Token]]] = []
+        self.tokens = TokenStream(self.lexer)
+        self.current_token = self.tokens.peek()
+        self.tokenStack: Stack[Token] = Stack()     # Stack for tokens as input for actions
+        self.valueStack: Stack[AST] = Stack()       # Stack for ast nodes
+        if sink is not None:
+            body = StreamingBody(sink, self.tokenStack)
+        elif record:
+            body = RecordingBody(self.table, self.tokens, self.valueStack)
+        else:
+            body = []
+        self.valueStack.push(Module(body=body, type_ignores=[]))
+        self.calls = profile.wrap(self.table.actions) if profile is not None else self.table.calls
+        operators = OperatorTable.fromTable(self.table) if precedence else None
+        self.expressions = (
+            ExpressionParser(operators, self.tokens, self.valueStack, self.tokenStack, self.calls)
+            if operators is not None
+            else None
+        )
+        self.stack.append(self.table.Tag(NonTerminal(start)))     # Stack for ll parsing
         self.symtable = SymbolTable()
-
-        self.current_token = next(self.lexer.tokens())
         logger.info("Initialized Parser")
 
     def parse(self):
         """This method runs the entire parsing process. A parse tree is generated upon success.
 
-        :raises TypeError: A incorrect object type was encountered on the stack.
+        Every step pops a tagged entry off :py:attr:`stack`. A nonterminal is expanded with a lookup in the compressed
+        table, see :py:meth:`LLTable.Prediction`, the chosen expansion is already reversed and is pushed as a whole.
+        A terminal is compared to the class of the current token and an action is looked up in :py:attr:`calls`
+        by its id and called with the value and token stacks. An expression is handed to :py:attr:`expressions` as a whole, the table only expands it
+        when the expression parser leaves it to the table.
+
+        With :py:attr:`recover` set, a syntax error is recorded in :py:attr:`diagnostics` and the parse resumes,
+        see :py:meth:`recoverNonTerminal` and :py:meth:`recoverTerminal`. Actions are no longer called after the
+        first error, so the tree is only meaningful when :py:attr:`diagnostics` stays empty.
+
+        With :py:attr:`generated` set, the nonterminals on :py:attr:`stack` are parsed by the module
+        :py:func:`rdgen.loadParser` generates for the table instead, it builds the same tree and fails the same way.
+
+        :raises ValueError: The input can not be lexed or parsed, and :py:attr:`recover` is not set.
         """
         logger.info("START parsing")
-        while not self.stack.empty():
-            top = self.stack.get()
-            logger.debug(
-                f"Current iteration, top {top}, input token {self.current_token}"
-            )
-            logger.debug(f"Queue {list(self.stack.queue)}")
-            logger.debug(f"valueStack {list(self.valueStack.queue)}\n\n")
-            match top:
-                case NonTerminal():
-                    self.handleNonTerminal(top)
-
-                case Terminal():
-                    self.handleTerminal(top)
-
-                case Action():
-                    self.handleAction(top)
-                case _:
-                    raise TypeError(
-                        f"Wrong type of object found on stack, {top.__class__}"
-                    )
-
-    def handleNonTerminal(self, top: NonTerminal):
-        what_to_push = self.table.Predict(top, self.current_token)
-        if what_to_push is None:
-            logger.error(f"Failed parsing input, {top, self.current_token}")
-            raise ValueError(
-                f"Failed parsing input NonTerminal, failed at {top, self.current_token}"
-            )
-        if what_to_push.RHS == Epsilon():
+        if self.current_token is None:
+            self.failLexer()
             return
-        logger.debug(f"Pushing {list(reversed(what_to_push.RHS))}")
-        for symbol in reversed(what_to_push.RHS):
-            self.stack.put(symbol)
-
-    def handleTerminal(self, top: Terminal):
-        if top == self.current_token:
-            self.tokenStack.put(self.current_token)
-            if self.current_token != EndOfFile():
-                self.current_token = next(self.lexer.tokens())
-        else:
-            logger.error(f"Failed parsing input Terminal, {top, self.current_token}")
-            raise ValueError(
-                f"Cannot parse input, failed at {top, self.current_token}"
-            )
-
-    def handleAction(self, top: Action):
-        logger.debug(f"Applying action {type(top).__name__}")
-        top.call(self.valueStack, self.tokenStack)
+        if self.generated:
+            rdgen.loadParser(self.table).parse(self, self.calls)
+            return
+        trace = logger.isEnabledFor(TRACE)
+        stack = self.stack
+        pop = stack.pop
+        extend = stack.extend
+        valueStack = self.valueStack
+        tokenStack = self.tokenStack
+        pushToken = tokenStack.push
+        advance = self.tokens.advance
+        diagnostics = self.diagnostics
+        calls = self.calls
+        base = self.table.base
+        check = self.table.check
+        targets = self.table.next
+        expansions = self.table.expansions
+        terminalIds = self.table.terminalIds
+        unknown = self.table.width - 1
+        expressions = self.expressions
+        expression = expressions.operators.row if expressions is not None else -1
+
+        token = self.current_token
+        column = terminalIds.get(type(token), unknown)
+        while stack:
+            tag, value = pop()
+            if trace:
+                logger.log(
+                    TRACE, "Current iteration, top %s, input token %s, valueStack %s", (tag, value), token, valueStack
+                )
+            if tag == NONTERMINAL:
+                if value == expression and not diagnostics:
+                    parsed = expressions.parse(token)
+                    if parsed is not None:
+                        token = self.current_token = parsed
+                        column = terminalIds.get(type(token), unknown)
+                        continue
+                index = base[value] + column
+                production = targets[index] if check[index] == value else 0
+                if not production:
+                    self.failNonTerminal(value)
+                    if self.recoverNonTerminal(value):
+                        stack.append((tag, value))
+                    token = self.current_token
+                    if token is None:
+                        break
+                    column = terminalIds.get(type(token), unknown)
+                    continue
+                extend(expansions[production])
+            elif tag == TERMINAL:
+                if type(token) is not value:
+                    self.failTerminal(value)
+                    if self.recoverTerminal(value):
+                        stack.append((tag, value))
+                    token = self.current_token
+                    if token is None:
+                        break
+                    column = terminalIds.get(type(token), unknown)
+                    continue
+                pushToken(token)
+                if type(token) is not EndOfFile:
+                    token = self.current_token = advance()
+                    if token is None:
+                        self.failLexer()
+                        break
+                    column = terminalIds.get(type(token), unknown)
+            elif not diagnostics:
+                calls[value](valueStack, tokenStack)
+        if diagnostics:
+            logger.info(f"Parsing finished with {len(diagnostics)} errors")
+
+    def recoverNonTerminal(self, row: int) -> bool:
+        """Synchronise after no production of a nonterminal starts with the current token, in panic mode.
+
+        Tokens are skipped until one either starts a production of the nonterminal, which is then expanded,
+        or is in its FOLLOW set, so the nonterminal is dropped and the symbols below it continue. Skipping also
+        stops at a ``;`` or ``}`` that a symbol below can continue with, see :py:meth:`canResume`, so an error
+        inside a statement resumes at the end of that statement or block at the latest.
+
+        :param row: Id of the nonterminal in the :py:class:`LLTable`.
+        :return: Whether the nonterminal should be expanded again, otherwise it is dropped.
+        """
+        table = self.table
+        follow = {type(terminal) for terminal in table.followSets[table.nonTerminals[row]]}
+        token = self.current_token
+        while token is not None:
+            if table.PredictId(row, token):
+                return True
+            if type(token) in follow or type(token) is EndOfFile or self.canResume(token):
+                return False
+            token = self.skip()
+        return False
+
+    def canResume(self, token: Token) -> bool:
+        """Whether the parse can continue at a statement or block end after the symbols above it are dropped.
+
+        :param token: The current token.
+        :return: True if the token is ``;`` or ``}`` and a symbol on :py:attr:`stack` matches or expands on it.
+        """
+        if type(token) not in (Semicolon, RightCurly):
+            return False
+        table = self.table
+        column = table.terminalIds[type(token)]
+        for tag, value in reversed(self.stack):
+            if tag == TERMINAL and value is type(token):
+                return True
+            if tag == NONTERMINAL and table.Prediction(value, column):
+                return True
+        return False
+
+    def recoverTerminal(self, expected: type[Token]) -> bool:
+        """Synchronise after the current token is not the expected terminal.
+
+        The terminal is assumed to be missing and is dropped, unless it is :py:class:`tokens.EndOfFile`, then
+        the remaining tokens are skipped instead.
+
+        :param expected: The token class on top of the stack.
+        :return: Whether the terminal should be matched again, otherwise it is dropped.
+        """
+        if expected is not EndOfFile:
+            return False
+        while self.current_token is not None and type(self.current_token) is not EndOfFile:
+            self.skip()
+        return True
+
+    def skip(self) -> Token | None:
+        """Skip the current token during error recovery.
+
+        :return: The new current token, None when the lexer failed.
+        """
+        logger.debug("Skipping %s", self.current_token)
+        self.current_token = self.tokens.advance()
+        if self.current_token is None:
+            self.failLexer()
+        self.errorToken = self.current_token
+        return self.current_token
+
+    def fail(self, message: str, line: int | None, column: int | None) -> None:
+        """Raise a syntax error, or record it in :py:attr:`diagnostics` when the parser recovers from errors.
+
+        Errors at the token where the previous diagnostic was recorded, or where the recovery stopped skipping,
+        are follow-ups of that error and are not recorded again.
+
+        :param message: Description of the error.
+        :param line: Line of the offending token.
+        :param column: Column of the offending token.
+        :raises ValueError: :py:attr:`recover` is not set.
+        """
+        if not self.recover:
+            raise ValueError(message)
+        if self.diagnostics and self.current_token is self.errorToken:
+            logger.debug("Suppressed follow-up error, %s", message)
+            return
+        self.diagnostics.append(Diagnostic(message, line, column))
+        self.errorToken = self.current_token
+
+    def failNonTerminal(self, row: int):
+        """Report that no production of a nonterminal starts with the current token.
+
+        :param row: Id of the nonterminal in the :py:class:`LLTable`.
+        :raises ValueError: :py:attr:`recover` is not set.
+        """
+        top = self.table.nonTerminals[row]
+        logger.error(f"Failed parsing input, {top, self.current_token}")
+        self.fail(
+            f"Failed parsing input NonTerminal, failed at {top, self.current_token}"
+            f" on line {self.current_token.line_no}, column {self.current_token.column}",
+            self.current_token.line_no,
+            self.current_token.column,
+        )
+
+    def failTerminal(self, expected: type[Token]):
+        """Report that the current token is not the expected terminal.
+
+        :param expected: The token class on top of the stack.
+        :raises ValueError: :py:attr:`recover` is not set.
+        """
+        top = expected()
+        logger.error(f"Failed parsing input Terminal, {top, self.current_token}")
+        self.fail(
+            f"Cannot parse input, failed at {top, self.current_token}"
+            f" on line {self.current_token.line_no}, column {self.current_token.column}",
+            self.current_token.line_no,
+            self.current_token.column,
+        )
+
+    def failLexer(self):
+        """Report that the lexer did not match any token.
+
+        :raises ValueError: :py:attr:`recover` is not set.
+        """
+        logger.error(f"Failed lexing input at offset {self.lexer.cursor}")
+        line, column = self.lexer.lines.position(self.lexer.cursor)
+        self.fail(f"Cannot lex input, failed on line {line}, column {column}", line, column)
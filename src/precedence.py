@@ -0,0 +1,348 @@
+import logging
+from dataclasses import dataclass
+from typing import Callable
+from lex import TokenStream
+from lltable import ACTION, NONTERMINAL, TERMINAL, LLTable
+from stack import Stack
+from symbol import NonTerminal
+from tokens import EndOfFile, Token
+from tracing import TRACE
+
+logger = logging.getLogger(__name__)
+
+EXPRESSION = "expression"
+"""Nonterminal of the expressions parsed by :py:class:`ExpressionParser`."""
+
+MAX_DEPTH = 100
+"""Deepest nesting of operands :py:class:`ExpressionParser` parses, deeper expressions are left to the table.
+
+Every nested operand is a Python call, the limit stays well below :py:func:`sys.getrecursionlimit` so a
+:py:class:`RecursionError` is never raised, possibly inside the generator of the token stream, which would
+close it.
+"""
+
+ActionIds = tuple[int, ...]
+ActionCall = Callable[[Stack, Stack], object]
+
+
+@dataclass
+class OperatorTable:
+    """The operators of an expression grammar, read off the rows of a compiled :py:class:`LLTable`.
+
+    The expression grammar is the usual LL(1) cascade of precedence levels, each level a nonterminal
+    ``level -> operand level_prime`` with ``level_prime -> operator operand actions level_prime | epsilon``.
+    The level below the last one takes prefix operators, ``unary -> operator unary actions | primary``,
+    and ``primary`` is a literal or a parenthesized expression. Levels are numbered from the loosest, 0.
+
+    Every entry is taken from :py:meth:`LLTable.Prediction`, token class by token class, so the table and
+    :py:class:`ExpressionParser` choose the same production for every token. A token class whose production has
+    any other shape is left out, :py:class:`ExpressionParser` leaves those expressions to the table.
+
+    :param row: Row of the expression nonterminal.
+    :param starts: Per level, the token classes every nonterminal down to ``unary`` predicts.
+    :param closes: Per level, the token classes every ``_prime`` from that level up predicts epsilon for.
+        The entry after the last level holds every token class.
+    Actions are kept as their ids in :py:attr:`LLTable.actions`, every :py:class:`ExpressionParser` binds them to
+    the callables of its parser.
+
+    :param binary: Level, operand level and actions of every infix operator. The right operand of an operator
+        usually starts at the next level, but may start at any level above it, leaving out the levels in between.
+    :param prefixes: Actions of every prefix operator, run after its operand.
+    :param atoms: Actions of every token class that is an operand by itself.
+    :param groups: Closing token class and actions of every token class opening a nested expression.
+    """
+
+    row: int
+    starts: list[frozenset[type[Token]]]
+    closes: list[frozenset[type[Token]]]
+    binary: dict[type[Token], tuple[int, int, ActionIds]]
+    prefixes: dict[type[Token], ActionIds]
+    atoms: dict[type[Token], ActionIds]
+    groups: dict[type[Token], tuple[type[Token], ActionIds]]
+
+    @classmethod
+    def fromTable(cls, table: LLTable, start: str = EXPRESSION) -> "OperatorTable | None":
+        """Read the operator table of an expression nonterminal, computed once per table.
+
+        :param table: The compiled LL table.
+        :param start: Name of the expression nonterminal.
+        :return: The operator table, None if the grammar has no such nonterminal or it is not a cascade of levels.
+        """
+        if start not in table.operatorTables:
+            table.operatorTables[start] = cls.compute(table, start)
+        return table.operatorTables[start]
+
+    @classmethod
+    def compute(cls, table: LLTable, start: str) -> "OperatorTable | None":
+        """Read the operator table of an expression nonterminal, see :py:meth:`fromTable`.
+
+        :param table: The compiled LL table.
+        :param start: Name of the expression nonterminal.
+        :return: The operator table, or None.
+        """
+        row = table.nonTerminalIds.get(NonTerminal(start))
+        if row is None:
+            return None
+        rules: dict[int, list[int]] = {}
+        for production in range(1, len(table.productions)):
+            rules.setdefault(table.nonTerminalIds[table.productions[production].LHS], []).append(production)
+
+        def rhs(production: int) -> list[tuple]:
+            return list(reversed(table.expansions[production]))
+
+        def predicted(row: int) -> dict[type[Token], int]:
+            return {
+                token_class: table.Prediction(row, column)
+                for token_class, column in table.terminalIds.items()
+                if token_class is not EndOfFile
+            }
+
+        # Walk down the cascade, entries[level] are the rows expanded before an operand of that level is parsed.
+        entries: list[list[tuple[int, int]]] = [[]]
+        primes: list[int] = []
+        current = row
+        while len(rules.get(current, [])) == 1:
+            production = rules[current][0]
+            symbols = rhs(production)
+            entries[-1].append((current, production))
+            if len(symbols) == 1 and symbols[0][0] == NONTERMINAL:
+                current = symbols[0][1]
+            elif len(symbols) == 2 and symbols[0][0] == NONTERMINAL and symbols[1][0] == NONTERMINAL:
+                current, prime = symbols[0][1], symbols[1][1]
+                primes.append(prime)
+                entries.append([])
+            else:
+                return None
+        if not primes:
+            return None
+        unary = current
+        levels = {rows[0][0]: level for level, rows in enumerate(entries) if rows}
+        levels[unary] = len(primes)
+
+        all_classes = frozenset(predicted(row))
+        starts = []
+        for level in range(len(entries)):
+            accepted = set(all_classes)
+            for entry_row, production in (entry for rows in entries[level:] for entry in rows):
+                accepted &= {token_class for token_class, chosen in predicted(entry_row).items() if chosen == production}
+            starts.append(frozenset(accepted))
+
+        closes = [all_classes]
+        binary: dict[type[Token], tuple[int, int, ActionIds]] = {}
+        conflicts = set()
+        for level in reversed(range(len(primes))):
+            prime = primes[level]
+            epsilon = set()
+            for token_class, production in predicted(prime).items():
+                symbols = rhs(production) if production else None
+                if symbols == []:
+                    epsilon.add(token_class)
+                elif (
+                    symbols
+                    and symbols[0] == (TERMINAL, token_class)
+                    and len(symbols) > 2
+                    and symbols[1][0] == NONTERMINAL
+                    and levels.get(symbols[1][1], -1) > level
+                    and symbols[-1] == (NONTERMINAL, prime)
+                    and all(tag == ACTION for tag, _ in symbols[2:-1])
+                ):
+                    if token_class in binary:
+                        conflicts.add(token_class)
+                    operand = levels[symbols[1][1]]
+                    binary[token_class] = (level, operand, tuple(action for _, action in symbols[2:-1]))
+            closes.insert(0, closes[0] & epsilon)
+        for token_class in conflicts:
+            del binary[token_class]
+
+        prefixes: dict[type[Token], ActionIds] = {}
+        atoms: dict[type[Token], ActionIds] = {}
+        groups: dict[type[Token], tuple[type[Token], ActionIds]] = {}
+        for token_class, production in predicted(unary).items():
+            symbols = rhs(production) if production else []
+            if len(symbols) == 1 and symbols[0][0] == NONTERMINAL:
+                production = table.Prediction(symbols[0][1], table.terminalIds[token_class])
+                symbols = rhs(production) if production else []
+                if symbols[:1] != [(TERMINAL, token_class)]:
+                    continue
+                if all(tag == ACTION for tag, _ in symbols[1:]):
+                    atoms[token_class] = tuple(action for _, action in symbols[1:])
+                elif (
+                    symbols[1:2] == [(NONTERMINAL, row)]
+                    and len(symbols) > 2
+                    and symbols[2][0] == TERMINAL
+                    and symbols[2][1] is not EndOfFile
+                    and all(tag == ACTION for tag, _ in symbols[3:])
+                ):
+                    groups[token_class] = (symbols[2][1], tuple(action for _, action in symbols[3:]))
+            elif (
+                symbols[:2] == [(TERMINAL, token_class), (NONTERMINAL, unary)]
+                and all(tag == ACTION for tag, _ in symbols[2:])
+            ):
+                prefixes[token_class] = tuple(action for _, action in symbols[2:])
+
+        logger.info(f"Read {len(primes)} precedence levels of {start}, {len(binary)} infix operators")
+        return cls(row, starts, closes, binary, prefixes, atoms, groups)
+
+
+class Fallback(Exception):
+    """Raised by :py:class:`ExpressionParser` when an expression has to be parsed by the table instead."""
+
+
+class ExpressionParser:
+    """Parses expressions by precedence climbing, instead of expanding one nonterminal per precedence level.
+
+    The table-driven parser expands every level of the cascade for every operand, a single literal passes
+    through a dozen nonterminals and epsilon ``_prime`` productions. This parser reads the operand, then loops
+    over the infix operators, parsing the right operand of an operator with the levels above it only. It matches
+    the same tokens, pushes them on the token stack and calls the same actions in the same order as the table,
+    so it builds exactly the same nodes.
+
+    Anything the :py:class:`OperatorTable` does not cover, including every syntax error and operands nested
+    deeper than :py:data:`MAX_DEPTH`, is left to the table.
+    :py:meth:`parse` then restores the stacks and the token stream and returns None, the table parses the
+    expression again and reports the error as usual.
+
+    :param operators: The operator table of the grammar.
+    :param tokens: The token stream of the parser.
+    :param valueStack: The value stack of the parser.
+    :param tokenStack: The token stack of the parser.
+    :param calls: The action callables of the parser, by action id.
+    :param climb: The climbing function, see :py:meth:`climber`.
+    """
+
+    def __init__(
+        self,
+        operators: OperatorTable,
+        tokens: TokenStream,
+        valueStack: Stack,
+        tokenStack: Stack,
+        calls: tuple[ActionCall, ...],
+    ) -> None:
+        """ExpressionParser constructor.
+
+        :param operators: The operator table of the grammar.
+        :param tokens: The token stream of the parser.
+        :param valueStack: The value stack of the parser.
+        :param tokenStack: The token stack of the parser.
+        :param calls: The action callables of the parser, see :py:attr:`LLTable.calls`.
+        """
+        self.operators = operators
+        self.tokens = tokens
+        self.valueStack = valueStack
+        self.tokenStack = tokenStack
+        self.calls = calls
+        self.climb = self.climber()
+
+    def parse(self, token: Token) -> Token | None:
+        """Parse an expression starting at the current token.
+
+        :param token: The current token, the token stream is positioned at it.
+        :return: The token after the expression, or None if the expression is left to the table.
+        """
+        tokens = self.tokens
+        marker = tokens.mark()
+        values = len(self.valueStack)
+        matched = len(self.tokenStack)
+        try:
+            return self.climb(token, 0, 0)
+        except Fallback:
+            if logger.isEnabledFor(TRACE):
+                logger.log(TRACE, "Expression at %s left to the table", token)
+            del self.valueStack[values:]
+            del self.tokenStack[matched:]
+            tokens.rewind(marker)
+            return None
+        finally:
+            tokens.release(marker)
+
+    def climber(self) -> Callable[[Token, int, int], Token]:
+        """Build the climbing function, with the operator table, the stacks and the token stream bound to locals.
+
+        The function parses an expression of the levels from ``minimum`` up, starting at ``token``, and returns the
+        token after it. ``depth`` counts the operands it is nested in. It raises :py:class:`Fallback` when the table
+        has to parse the expression.
+
+        :return: The function ``climb(token, minimum, depth)``.
+        """
+        operators = self.operators
+        calls = self.calls
+
+        def bind(actions: ActionIds) -> tuple[ActionCall, ...]:
+            return tuple(calls[action] for action in actions)
+
+        starts = operators.starts
+        closes = operators.closes
+        binary = {kind: (level, operand, bind(actions)) for kind, (level, operand, actions) in operators.binary.items()}.get
+        prefixes = {kind: bind(actions) for kind, actions in operators.prefixes.items()}
+        atoms = {kind: bind(actions) for kind, actions in operators.atoms.items()}.get
+        groups = {kind: (closing, bind(actions)) for kind, (closing, actions) in operators.groups.items()}.get
+        advance = self.tokens.advance
+        valueStack = self.valueStack
+        tokenStack = self.tokenStack
+        push = tokenStack.push
+        top = len(closes) - 2
+
+        def climb(token: Token, minimum: int, depth: int) -> Token:
+            kind = type(token)
+            if kind not in starts[minimum] or depth > MAX_DEPTH:
+                raise Fallback
+
+            # The operand, with its prefix operators, a literal or a nested expression.
+            pending = []
+            while kind in prefixes:
+                pending.append(prefixes[kind])
+                push(token)
+                token = advance()
+                if token is None:
+                    raise Fallback
+                kind = type(token)
+            actions = atoms(kind)
+            if actions is not None:
+                push(token)
+                token = advance()
+                if token is None:
+                    raise Fallback
+            else:
+                group = groups(kind)
+                if group is None:
+                    raise Fallback
+                closing, actions = group
+                push(token)
+                token = advance()
+                if token is None:
+                    raise Fallback
+                token = climb(token, 0, depth + 1)
+                if type(token) is not closing:
+                    raise Fallback
+                push(token)
+                token = advance()
+                if token is None:
+                    raise Fallback
+            for action in actions:
+                action(valueStack, tokenStack)
+            while pending:
+                for action in pending.pop():
+                    action(valueStack, tokenStack)
+
+            # The infix operators, only the levels up to the last one continue the expression, like the _prime
+            # productions left on the stack of the table-driven parser.
+            ceiling = top
+            while True:
+                kind = type(token)
+                operator = binary(kind)
+                if operator is None or not minimum <= operator[0] <= ceiling:
+                    if kind not in closes[minimum]:
+                        raise Fallback
+                    return token
+                ceiling, operand, actions = operator
+                if kind not in closes[ceiling + 1]:
+                    raise Fallback
+                push(token)
+                token = advance()
+                if token is None:
+                    raise Fallback
+                token = climb(token, operand, depth + 1)
+                for action in actions:
+                    action(valueStack, tokenStack)
+
+        return climb
@@ -0,0 +1,180 @@
+import importlib.util
+import logging
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from cache import cacheDirectory, writeAtomic
+from lexgen import importName
+from lltable import ACTION, NONTERMINAL, LLTable
+from precedence import OperatorTable
+from tokens import EndOfFile, Token
+
+logger = logging.getLogger(__name__)
+
+VERSION = 3
+"""Version of the generated code, part of the cache key so a changed generator never loads a stale parser."""
+
+
+def generate(table: LLTable) -> str:
+    """Generate the source of a recursive-descent parser module for the grammar of a compiled :py:class:`LLTable`.
+
+    Every nonterminal becomes a nested function of ``parse``, which branches on the class of the current token
+    exactly like a row of the :py:class:`LLTable` and runs the chosen right-hand side inline. Terminals are
+    matched and pushed on the token stack, actions are called with the value and token stacks and nonterminals are
+    calls. A production ending with its own nonterminal, like a list of statements, loops instead of recursing.
+
+    The module has a single entry point, ``parse(parser, calls)``, where ``calls`` are the action callables of the
+    parser, :py:attr:`LLTable.calls` or their timed wrappers. It parses the nonterminals left on the parser's stack, usually
+    just the start symbol. Errors are reported through the ``fail`` methods of the :py:class:`parse.Parser`,
+    so messages are the same as with the table-driven parse. Like the table-driven parse, the function of the
+    expression nonterminal first offers the expression to :py:attr:`parse.Parser.expressions`.
+
+    :param table: The compiled LL table.
+    :return: Python source code.
+    """
+    operators = OperatorTable.fromTable(table)
+    tokenClasses = sorted(table.terminalIds, key=table.terminalIds.get)
+    tokenNames = {token_class: f"t{number}" for number, token_class in enumerate(tokenClasses)}
+    tokenSets: dict[frozenset, str] = {}
+
+    def condition(classes: list[type[Token]]) -> str:
+        if len(classes) <= 3:
+            return " or ".join(f"kind is {tokenNames[token_class]}" for token_class in classes)
+        members = frozenset(classes)
+        if members not in tokenSets:
+            tokenSets[members] = f"s{len(tokenSets)}"
+        return f"kind in {tokenSets[members]}"
+
+    def statements(production: int, row: int, indent: str) -> list[str]:
+        expansion = list(reversed(table.expansions[production]))
+        lines = [f"{indent}# {str(table.productions[production]).strip()}"]
+        tail = bool(expansion) and expansion[-1] == (NONTERMINAL, row)
+        for tag, value in expansion[:-1] if tail else expansion:
+            if tag == NONTERMINAL:
+                lines.append(f"{indent}n{value}()")
+            elif tag == ACTION:
+                lines.append(f"{indent}a{value}(valueStack, tokenStack)")
+            else:
+                lines.append(f"{indent}if kind is not {tokenNames[value]}:")
+                lines.append(f"{indent}    failTerminal({tokenNames[value]}, token)")
+                lines.append(f"{indent}pushToken(token)")
+                if value is not EndOfFile:
+                    lines.append(f"{indent}token = advance()")
+                    lines.append(f"{indent}if token is None:")
+                    lines.append(f"{indent}    failLexer()")
+                    lines.append(f"{indent}kind = type(token)")
+        lines.append(f"{indent}{'continue' if tail else 'return'}")
+        return lines
+
+    functions: list[str] = []
+    for row, nonTerminal in enumerate(table.nonTerminals):
+        branches: dict[int, list[type[Token]]] = {}
+        for token_class, column in table.terminalIds.items():
+            production = table.Prediction(row, column)
+            if production:
+                branches.setdefault(production, []).append(token_class)
+        loops = any(
+            table.expansions[production] and table.expansions[production][0] == (NONTERMINAL, row)
+            for production in branches
+        )
+        branch = "            " if loops else "        "
+        body = [f"    def n{row}():", f'        """{nonTerminal}"""', "        nonlocal token, kind"]
+        if operators is not None and row == operators.row:
+            body += [
+                "        if expressions is not None:",
+                "            parsed = expressions.parse(token)",
+                "            if parsed is not None:",
+                "                token = parsed",
+                "                kind = type(token)",
+                "                return",
+            ]
+        if loops:
+            body.append("        while True:")
+        keyword = "if"
+        for production, classes in branches.items():
+            body.append(f"{branch}{keyword} {condition(classes)}:")
+            body += statements(production, row, branch + "    ")
+            keyword = "elif"
+        if branches:
+            body.append(f"{branch}else:")
+            body.append(f"{branch}    failNonTerminal({row}, token)")
+        else:
+            body.append(f"{branch}failNonTerminal({row}, token)")
+        functions.append("\n".join(body))
+
+    lines = [
+        f'"""Recursive-descent parser generated by :py:mod:`rdgen` for {len(table.nonTerminals)} nonterminals, do not edit."""',
+    ]
+    for token_class, name in tokenNames.items():
+        module, _, qualname = importName(token_class).rpartition(".")
+        lines.append(f"from {module} import {qualname} as {name}")
+    lines.append("")
+    lines.append(f"GRAMMAR = {table.Hash()!r}")
+    for members, name in tokenSets.items():
+        names = ", ".join(tokenNames[member] for member in tokenClasses if member in members)
+        lines.append(f"{name} = frozenset(({names},))")
+    lines += [
+        "",
+        "",
+        "def parse(parser, calls):",
+        "    valueStack = parser.valueStack",
+        "    tokenStack = parser.tokenStack",
+        "    pushToken = tokenStack.push",
+        "    advance = parser.tokens.advance",
+        "    failLexer = parser.failLexer",
+        "    expressions = parser.expressions",
+        *(f"    a{number} = calls[{number}]" for number in range(len(table.actions))),
+        "",
+        "    def failNonTerminal(row, current):",
+        "        parser.current_token = current",
+        "        parser.failNonTerminal(row)",
+        "",
+        "    def failTerminal(expected, current):",
+        "        parser.current_token = current",
+        "        parser.failTerminal(expected)",
+        "",
+        "    token = parser.current_token",
+        "    kind = type(token)",
+        "",
+        "\n\n".join(functions),
+        "",
+        f"    nonTerminals = ({', '.join(f'n{row}' for row in range(len(table.nonTerminals)))},)",
+        "    while parser.stack:",
+        "        _, row = parser.stack.pop()",
+        "        nonTerminals[row]()",
+        "    parser.current_token = token",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def loadParser(table: LLTable, directory: Path | None = None) -> ModuleType:
+    """Load the generated parser for the grammar of a table, generating it first if it is not cached yet.
+
+    Generated modules are stored in :py:func:`cache.cacheDirectory` under a name derived from :py:meth:`LLTable.Hash`,
+    so any change to the grammar or its actions produces a new module.
+
+    :param table: The compiled LL table.
+    :param directory: Where to cache the module, defaults to :py:func:`cache.cacheDirectory`.
+    :return: The generated module, call its ``parse`` function with a parser and its action callables.
+    """
+    name = f"rdparser_{table.Hash()[:32]}_{VERSION}"
+    path = Path(directory if directory is not None else cacheDirectory()) / f"{name}.py"
+    if not path.exists():
+        logger.info(f"Generating parser {path}")
+        writeAtomic(path, generate(table).encode())
+    return importParser(path)
+
+
+@lru_cache(maxsize=None)
+def importParser(path: Path) -> ModuleType:
+    """Import a generated parser module, every module is imported only once.
+
+    :param path: The generated module.
+    :return: The module.
+    """
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    logger.info(f"Loaded generated parser {path}")
+    return module
@@ -0,0 +1,50 @@
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class Stack(list[T]):
+    """A plain LIFO stack used by the :py:class:`parse.Parser` and the actions in :py:mod:`actions`.
+
+    It is a list, :py:meth:`push` is :py:meth:`list.append` and :py:meth:`pop` is :py:meth:`list.pop`, without the
+    locking of :py:class:`queue.LifoQueue`. The top of the stack is the end of the list.
+
+    >>> stack = Stack([1, 2])
+    >>> stack.push(3)
+    >>> stack.pop_n(2), stack.peek()
+    ([2, 3], 1)
+
+    :py:meth:`get` and :py:meth:`put` are kept as aliases of :py:meth:`pop` and :py:meth:`push`, so code written
+    against :py:class:`queue.LifoQueue` keeps working.
+    """
+
+    push = list.append
+    put = list.append
+    get = list.pop
+
+    def pop_n(self, n: int) -> list[T]:
+        """Remove the top :py:attr:`n` items.
+
+        :param n: Number of items to remove.
+        :raises IndexError: The stack holds fewer than :py:attr:`n` items.
+        :return: The items in the order they were pushed, the former top is last.
+        """
+        if n > len(self):
+            raise IndexError(f"Cannot pop {n} items from a stack of {len(self)}")
+        if n == 0:
+            return []
+        items = self[-n:]
+        del self[-n:]
+        return items
+
+    def peek(self, k: int = 0) -> T:
+        """Return an item without removing it.
+
+        :param k: How far below the top the item is, 0 is the top.
+        :raises IndexError: The stack holds :py:attr:`k` items or fewer.
+        :return: The item.
+        """
+        return self[-1 - k]
+
+    def empty(self) -> bool:
+        return not self
@@ -1,59 +1,105 @@
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 from ast import AST
-from queue import LifoQueue
+from threading import Lock
+from stack import Stack
 from symtable import SymbolTable
 
+symbolIds: dict[str, int] = {}
+"""Ids of all interned symbol names, see :py:func:`internSymbol`."""
+
+symbolIdsLock = Lock()
+
+
+def internSymbol(name: str) -> int:
+    """Return the unique id of a symbol name, assigning the next free id the first time a name is seen.
+
+    Symbols are equal when their names are, so every symbol keeps the id of its name in ``symbolId`` and is
+    hashed and compared by it. Ids are only valid in the current process, they are never pickled.
+
+    :param name: The name of the symbol, its ``str``.
+    :return: The id of the name.
+    """
+    try:
+        return symbolIds[name]
+    except KeyError:
+        with symbolIdsLock:
+            return symbolIds.setdefault(name, len(symbolIds))
+
 
 @dataclass
 class Symbol(ABC):
+    """Base class of grammar symbols. Symbols with the same name are equal, whatever their class.
+
+    Subclasses set ``symbolId`` to the :py:func:`internSymbol` id of their name, once per class for terminals
+    and once per instance for nonterminals, so hashing and comparing never builds the name again.
+    """
+
     def __hash__(self):
-        return hash(str(self))
+        return self.symbolId
 
     def __eq__(self, other: object) -> bool:
-        return str(self) == str(other)
+        try:
+            return self.symbolId == other.symbolId
+        except AttributeError:
+            return str(self) == str(other)
 
 
 class Terminal(Symbol):
+    symbolId = internSymbol("Terminal")
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.symbolId = internSymbol(cls.__name__)
+
     def __str__(self) -> str:
         return self.__class__.__name__
 
-    def __hash__(self):
-        return super().__hash__()
-
-    def __eq__(self, other: object) -> bool:
-        return super().__eq__(other)
+    __hash__ = Symbol.__hash__
+    __eq__ = Symbol.__eq__
 
 
 @dataclass
 class NonTerminal(Symbol):
     name: str
 
+    def __post_init__(self) -> None:
+        self.symbolId = internSymbol(self.name)
+
+    def __reduce__(self):
+        return NonTerminal, (self.name,)
+
     def __str__(self) -> str:
         return self.name
 
-    def __hash__(self):
-        return super().__hash__()
-
-    def __eq__(self, other: object) -> bool:
-        return super().__eq__(other)
+    __hash__ = Symbol.__hash__
+    __eq__ = Symbol.__eq__
 
 
 @dataclass
 class Action(Symbol):
+    """A semantic action, called by the parser when it reaches the action in the right-hand side of a production.
+
+    A single instance is shared by every parse of its grammar, including parses running in other threads, so
+    :py:meth:`call` must keep all parse state on the stacks it receives and never store it on the action.
+    """
+
     name: str = ""
 
+    @property
+    def symbolId(self) -> int:
+        return internSymbol(str(self))
+
     @abstractmethod
-    def call(self, ValueStack: LifoQueue[AST], TokenStack: LifoQueue):
+    def call(self, ValueStack: Stack[AST], TokenStack: Stack):
         pass
 
 
 class Epsilon(Symbol):
+    symbolId = internSymbol("Epsilon")
+
     def __str__(self) -> str:
         return "Epsilon"
 
-    def __hash__(self):
-        return super().__hash__()
-
-    def __eq__(self, other: object) -> bool:
-        return super().__eq__(other)
+    __hash__ = Symbol.__hash__
+    __eq__ = Symbol.__eq__
@@ -1,25 +1,27 @@
 from itertools import count
 
-object_incrementor = count(0, 1)
-
 
 class Record:
     def __init__(self, record_type:str, name=None) -> None:
         self.record_type = record_type
-        self.name = name if name else f"object_{object_incrementor.__next__()}"
+        self.name = name
 
 
 class SymbolTable:
     """
     Holds information about all symbols i.e. all objects in the fdtd simulation. The simulation is an object, so are all the blocks and light sources.
     Also stores information about the selected symbols.
+    Records added without a name are named ``object_0``, ``object_1`` and so on, counted per table.
     """
 
     def __init__(self) -> None:
         self.selected = []
         self.symbols = []
+        self.names = count(0, 1)
 
     def add(self, record: Record) -> None:
+        if not record.name:
+            record.name = f"object_{next(self.names)}"
         self.symbols.append(record)
         self.selected = [record]
 
@@ -1,28 +1,42 @@
 from symbol import Terminal
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tokenstore import LineIndex
 
 
 class Token(Terminal):
     """Tokens a are specific implementations of :py:class:`Terminal`.
 
-    :param line_no: Line number of source code where the token was found.
+    :param line_no: Line number of source code where the token was found, looked up on demand.
+    :param column: Column of source code where the token was found, looked up on demand.
     :param lexeme: Lexeme generating the token.
     :param lexeme_pattern: Regex pattern that represents the token.
+    :param start: Offset of the lexeme in the source code.
+    :param lines: Line index of the source code, used to look up :py:attr:`line_no` and :py:attr:`column`.
     """
 
     lexeme_pattern: str
 
     def __init__(self):
-        self.line_no: None | int = None
         self.lexeme: None | str = None
+        self.start: None | int = None
+        self.lines: None | LineIndex = None
 
-    def __str__(self) -> str:
-        return self.__class__.__name__
+    @property
+    def line_no(self) -> None | int:
+        if self.lines is None or self.start is None:
+            return None
+        return self.lines.line(self.start)
 
-    def __hash__(self):
-        return hash(str(self))
+    @property
+    def column(self) -> None | int:
+        if self.lines is None or self.start is None:
+            return None
+        return self.lines.position(self.start)[1]
 
-    def __eq__(self, other: object) -> bool:
-        return super().__eq__(other)
+    def __str__(self) -> str:
+        return self.__class__.__name__
 
 
 class Literal(Token):
@@ -44,11 +58,17 @@ class Literal(Token):
             else self.__class__.__name__
         )
 
-    def __hash__(self):
-        return hash(str(self))
 
-    def __eq__(self, other: object) -> bool:
-        return super().__eq__(other)
+class Keyword(Token):
+    """A special :py:class:`Token` for reserved words. Keywords are spelled like an :py:class:`Identifier`,
+    so the lexer does not match them with their own regex. It matches an identifier and looks its lexeme up
+    in a table of keywords instead.
+
+    :param lexeme_pattern: The reserved word, it has to be a valid identifier.
+    """
+
+    def __str__(self) -> str:
+        return self.__class__.__name__
 
 
 class Identifier(Literal):
@@ -376,7 +396,7 @@ class EndOfFile(Token):
     lexeme_pattern = r"\Z"
 
 # Keywords
-class Function(Token):
+class Function(Keyword):
     """
     Represents the 'function' keyword.
 
@@ -387,7 +407,7 @@ class Function(Token):
     lexeme_pattern = r"function"
 
 
-class For(Token):
+class For(Keyword):
     """
     Represents the 'for' keyword.
 
@@ -397,7 +417,7 @@ class For(Token):
 
     lexeme_pattern = r"for"
 
-class Break(Token):
+class Break(Keyword):
     """
     Represents the 'break' keyword.
 
@@ -407,7 +427,7 @@ class Break(Token):
 
     lexeme_pattern = r"break"
 
-class If(Token):
+class If(Keyword):
     """
     Represents the 'if' keyword.
 
@@ -418,7 +438,7 @@ class If(Token):
     lexeme_pattern = r"if"
 
 
-class Else(Token):
+class Else(Keyword):
     """
     Represents the 'else' keyword.
 
@@ -428,35 +448,35 @@ class Else(Token):
 
     lexeme_pattern = r"else"
 
-class AddFDTD(Token):
+class AddFDTD(Keyword):
     lexeme_pattern = r"addfdtd"
 
-class SetToken(Token):
+class SetToken(Keyword):
     lexeme_pattern = r"set"
 
-class AddRect(Token):
+class AddRect(Keyword):
     lexeme_pattern = r"addrect"
 
-class AddSphere(Token):
+class AddSphere(Keyword):
     lexeme_pattern = r"addsphere"
 
-class SelectAll(Token):
+class SelectAll(Keyword):
     lexeme_pattern = r"selectall"
 
-class UnselectAll(Token):
+class UnselectAll(Keyword):
     lexeme_pattern = r"unselectall"
 
-class Select(Token):
+class Select(Keyword):
     lexeme_pattern = r"select"
 
-class ShiftSelect(Token):
+class ShiftSelect(Keyword):
     lexeme_pattern = r"shiftselect"
 
-class AddPlane(Token):
+class AddPlane(Keyword):
     lexeme_pattern = r"addplane"
 
-class AddDFTMonitor(Token):
+class AddDFTMonitor(Keyword):
     lexeme_pattern = r"adddftmonitor"
 
-class Run(Token):
+class Run(Keyword):
     lexeme_pattern = r"run"
\ No newline at end of file
@@ -0,0 +1,173 @@
+from array import array
+from bisect import bisect_left
+from typing import Iterator
+from tokens import Token
+import mmap
+import re
+
+
+class LineIndex:
+    """Maps source offsets to line and column numbers.
+
+    The offsets of all newlines are collected into an array the first time a position is requested. Every lookup
+    after that is a binary search, so the lexer does not have to count lines while it lexes.
+    Lines and columns start at 1. Columns of a bytes-like source are counted in bytes.
+
+    :param source: The source code.
+    :param newlines: Offsets of all newline characters, None until the first lookup.
+    """
+
+    def __init__(self, source: str | bytes | mmap.mmap) -> None:
+        """LineIndex constructor, the index itself is built on the first lookup.
+
+        :param source: The source code.
+        """
+        self.source = source
+        self.newlines: array | None = None
+
+    def build(self) -> array:
+        """Collect the offsets of all newlines in the source.
+
+        :return: The newline offsets.
+        """
+        newline = "\n" if isinstance(self.source, str) else b"\n"
+        self.newlines = array("q", (match.start() for match in re.finditer(newline, self.source)))
+        return self.newlines
+
+    def line(self, offset: int) -> int:
+        """Return the line number of a source offset.
+
+        :param offset: Offset into the source.
+        :return: The line number.
+        """
+        newlines = self.newlines if self.newlines is not None else self.build()
+        return bisect_left(newlines, offset) + 1
+
+    def position(self, offset: int) -> tuple[int, int]:
+        """Return the line and column number of a source offset.
+
+        :param offset: Offset into the source.
+        :return: The line and column number.
+        """
+        line = self.line(offset)
+        line_start = self.newlines[line - 2] + 1 if line > 1 else 0
+        return line, offset - line_start + 1
+
+
+class TokenStore:
+    """Compact storage of a lexed token sequence.
+
+    Instead of one :py:class:`tokens.Token` instance per token, the store keeps three parallel arrays of machine
+    integers, the token kind and the start and end offset of its lexeme. Lexemes are sliced from the source only
+    when they are requested, so a stored token takes a few dozen bytes no matter how long its lexeme is.
+
+    Example usage::
+
+        store = Lexer("x = 1;").tokenize()
+        len(store)          # 5
+        store.kind(0)       # Identifier
+        store.lexeme(2)     # "1"
+
+    :param source: The lexed source code.
+    :param classes: Token classes indexed by their kind.
+    :param encoding: Encoding of a bytes-like source, None for a string source.
+    :param lines: The :py:class:`LineIndex` of the source.
+    :param kinds: Kind of every token, an index into :py:attr:`classes`.
+    :param starts: Offset of the first character of every lexeme.
+    :param ends: Offset one past the last character of every lexeme.
+    """
+
+    def __init__(
+        self,
+        source: str | bytes | mmap.mmap,
+        classes: list[type[Token]],
+        encoding: str | None = None,
+        lines: LineIndex | None = None,
+    ) -> None:
+        """TokenStore constructor, creates an empty store.
+
+        :param source: The source code the offsets refer to.
+        :param classes: Token classes indexed by their kind.
+        :param encoding: Used to decode lexemes when the source is bytes-like.
+        :param lines: A line index of the source to share, a new one is created if None.
+        """
+        self.source = source
+        self.classes = classes
+        self.encoding = encoding
+        self.lines = lines if lines is not None else LineIndex(source)
+        self.kinds = array("H")
+        self.starts = array("q")
+        self.ends = array("q")
+
+    def append(self, kind: int, start: int, end: int) -> None:
+        """Store a token.
+
+        :param kind: Index of the token class in :py:attr:`classes`.
+        :param start: Offset of the first character of the lexeme.
+        :param end: Offset one past the last character of the lexeme.
+        """
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def kind(self, index: int) -> type[Token]:
+        """Return the token class of a stored token.
+
+        :param index: Position of the token in the store.
+        :return: The token class.
+        """
+        return self.classes[self.kinds[index]]
+
+    def span(self, index: int) -> tuple[int, int]:
+        """Return the offsets of a stored token's lexeme.
+
+        :param index: Position of the token in the store.
+        :return: Start and end offset of the lexeme.
+        """
+        return self.starts[index], self.ends[index]
+
+    def position(self, index: int) -> tuple[int, int]:
+        """Return the line and column where a stored token starts.
+
+        :param index: Position of the token in the store.
+        :return: The line and column number.
+        """
+        return self.lines.position(self.starts[index])
+
+    def lexeme(self, index: int) -> str:
+        """Slice the lexeme of a stored token from the source.
+
+        :param index: Position of the token in the store.
+        :return: The lexeme.
+        """
+        lexeme = self.source[self.starts[index] : self.ends[index]]
+        if self.encoding is not None:
+            lexeme = lexeme.decode(self.encoding)
+        return lexeme
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> Token:
+        """Create a full :py:class:`tokens.Token` instance for a stored token.
+
+        :param index: Position of the token in the store.
+        :return: The token with its lexeme assigned.
+        """
+        token = self.kind(index)()
+        token.lexeme = self.lexeme(index)
+        token.start = self.starts[index]
+        token.lines = self.lines
+        return token
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __sizeof__(self) -> int:
+        return (
+            object.__sizeof__(self)
+            + self.kinds.__sizeof__()
+            + self.starts.__sizeof__()
+            + self.ends.__sizeof__()
+        )
@@ -0,0 +1,59 @@
+import logging
+from collections import deque
+from logging.handlers import MemoryHandler
+
+TRACE = 5
+"""Log level below :py:data:`logging.DEBUG` for per-token and per-step messages of the lexer and parser."""
+
+logging.addLevelName(TRACE, "TRACE")
+
+
+class RingBufferHandler(MemoryHandler):
+    """Keeps the most recent log records in memory and passes them on only when something goes wrong.
+
+    Older records are discarded once :py:attr:`capacity` records are buffered, so tracing a long transpile needs
+    a bounded amount of memory. When a record at :py:attr:`flushLevel` or above arrives, such as the error logged
+    by a failing parse, the buffered records are handed to :py:attr:`target` in order, followed by that record.
+
+    Example usage::
+
+        handler = RingBufferHandler(1000, target=logging.FileHandler("lumex.log"))
+        enableTracing(handler)
+
+    :param capacity: Maximal number of buffered records.
+    :param flushLevel: Records at this level or above dump the buffer.
+    :param target: Handler receiving the dumped records.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        flushLevel: int = logging.ERROR,
+        target: logging.Handler | None = None,
+    ) -> None:
+        """RingBufferHandler constructor.
+
+        :param capacity: Maximal number of buffered records.
+        :param flushLevel: Records at this level or above dump the buffer.
+        :param target: Handler receiving the dumped records.
+        """
+        super().__init__(capacity, flushLevel, target, flushOnClose=False)
+        self.buffer = deque(maxlen=capacity)
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.flushLevel
+
+
+def enableTracing(handler: logging.Handler, level: int = TRACE, logger: logging.Logger | None = None) -> None:
+    """Send log records down to :py:attr:`level` to a handler, usually a :py:class:`RingBufferHandler`.
+
+    Messages below the configured level are skipped before they are formatted, the lexer and parser check
+    :py:meth:`logging.Logger.isEnabledFor` once per token or step, so a disabled level costs nothing else.
+
+    :param handler: The handler to add.
+    :param level: The lowest level to record, :py:data:`TRACE` records every lexer and parser step.
+    :param logger: The logger to configure, the root logger by default.
+    """
+    logger = logger if logger is not None else logging.getLogger()
+    logger.setLevel(level)
+    logger.addHandler(handler)
@@ -0,0 +1,123 @@
+import ast
+import logging
+from types import ModuleType
+from typing import Callable
+from grammar import Grammar
+from lex import Lexer, Scanner, tokenClasses
+from lexgen import loadScanner
+from lltable import LLTable
+from lumerical_grammar import lumerical_grammar
+from parse import Diagnostic, Parser
+from profiling import ActionProfile
+
+logger = logging.getLogger(__name__)
+
+
+class Transpiler:
+    """A transpilation session, translating any number of Lumerical sources with the same grammar.
+
+    Everything derived from the grammar, the :py:class:`LLTable` and the scanner, is loaded once by the constructor.
+    Every call of :py:meth:`transpile` gets a fresh :py:class:`lex.Lexer` and :py:class:`parse.Parser`, so nothing
+    from one source, including a failed one, carries over into the next.
+
+    Example usage::
+
+        transpiler = Transpiler()
+        for source in sources:
+            print(transpiler.transpile(source))
+
+    :param grammar: The grammar of the source language.
+    :param table: The LL table of :py:attr:`grammar`.
+    :param scanner: The scanner shared by all lexers, see :py:func:`lexgen.loadScanner`.
+    :param generated: Whether sources are parsed with the parser generated by :py:mod:`rdgen`.
+    :param profile: Collects the time spent in every action over all sources, see :py:class:`profiling.ActionProfile`.
+    """
+
+    def __init__(
+        self,
+        grammar: Grammar = lumerical_grammar,
+        scanner: Scanner | ModuleType | None = None,
+        generated: bool = False,
+        profile: ActionProfile | None = None,
+    ) -> None:
+        """Transpiler constructor.
+
+        :param grammar: The grammar of the source language.
+        :param scanner: The scanner shared by all lexers, the generated scanner for all token classes by default.
+        :param generated: Parse with the recursive-descent parser generated from the grammar instead of the table.
+        :param profile: Count the calls of every action and the time spent in them, in every parse of the session.
+        """
+        self.grammar = grammar
+        self.table = LLTable.Cached(grammar)
+        self.scanner = scanner if scanner is not None else loadScanner(*tokenClasses())
+        self.generated = generated
+        self.profile = profile
+        logger.info("Initialized Transpiler")
+
+    def parser(
+        self,
+        source: str,
+        recover: bool = False,
+        sink: Callable[[str], object] | None = None,
+    ) -> Parser:
+        """Create a parser for a single source, sharing the table and scanner of the session.
+
+        :param source: Lumerical source code.
+        :param recover: Collect all syntax errors instead of raising the first one.
+        :param sink: Stream the code of every top-level statement to this callable.
+        :return: The parser, :py:meth:`parse.Parser.parse` was not called yet.
+        """
+        lexer = Lexer(source, scanner=self.scanner)
+        return Parser(
+            self.grammar,
+            lexer,
+            generated=self.generated and not recover,
+            recover=recover,
+            table=self.table,
+            sink=sink,
+            profile=self.profile,
+        )
+
+    def transpile(self, source: str, unparse: bool = True) -> str | ast.Module:
+        """Transpile a Lumerical source to Python.
+
+        :param source: Lumerical source code.
+        :param unparse: Return Python source code, otherwise the module AST.
+        :raises ValueError: The source can not be lexed or parsed.
+        :return: Python source code, or the :py:class:`ast.Module` when :py:attr:`unparse` is False.
+        """
+        parser = self.parser(source)
+        parser.parse()
+        tree = ast.fix_missing_locations(parser.valueStack.get())
+        return ast.unparse(tree) if unparse else tree
+
+    def stream(self, source: str, sink: Callable[[str], object]) -> int:
+        """Transpile a Lumerical source, writing every top-level statement to a sink as soon as it is parsed.
+
+        Statements are not kept after they are written, so memory stays bounded however long the source is.
+        They are written in the order :py:meth:`transpile` returns them. When the source has a syntax error,
+        the statements before it have already been written.
+
+        Example usage::
+
+            with open("simulation.py", "w") as file:
+                transpiler.stream(source, file.write)
+
+        :param source: Lumerical source code.
+        :param sink: Called with the code of every statement, each ending with a newline.
+        :raises ValueError: The source can not be lexed or parsed.
+        :return: Number of statements written.
+        """
+        parser = self.parser(source, sink=sink)
+        parser.parse()
+        return parser.valueStack.get().body.emitted
+
+    def check(self, source: str) -> list[Diagnostic]:
+        """Find all syntax errors of a source in a single parse, without transpiling it.
+
+        :param source: Lumerical source code.
+        :return: The syntax errors in input order, empty if the source is valid.
+        """
+        parser = self.parser(source, recover=True)
+        parser.parse()
+        return parser.diagnostics
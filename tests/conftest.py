@@ -1,8 +1,17 @@
 import sys
+import pytest
 from pathlib import Path
 
 # Get the parent directory of the current file (which is the tests directory)
-# and append the src directory to sys.path
+# and put the src directory first on sys.path, before the standard library symtable module
 src_path = Path(__file__).resolve().parent.parent / 'src'
-sys.path.append(str(src_path))
+sys.path.insert(0, str(src_path))
 
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_directory(tmp_path_factory):
+    """Keep generated lexers, parsers and tables out of the user's cache directory."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        directory = tmp_path_factory.mktemp("cache")
+        monkeypatch.setenv("LUMEX_CACHE_DIR", str(directory))
+        yield directory
@@ -0,0 +1,44 @@
+import ast
+import pytest
+from incremental import Document
+from transpiler import Transpiler
+
+SOURCE = "x = 1;\nif (x > 1) {z = 3;} else {z = 4;}\nfor(i=1:3) {q=i;}\ny = x + 2;\n"
+
+
+@pytest.fixture(scope="module")
+def transpiler():
+    return Transpiler()
+
+
+def expected(transpiler, source):
+    return ast.dump(transpiler.transpile(source, unparse=False))
+
+
+@pytest.mark.parametrize(
+    "offset,deleted,inserted,parsed",
+    [
+        (4, 1, "5", 1),
+        (SOURCE.index("q=i"), 3, "q=i+1", 1),
+        (0, 0, "w = 0;\n", 2),
+        (len(SOURCE), 0, "addrect;\n", 2),
+        (SOURCE.index("y ="), len("y = x + 2;\n"), "", 1),
+    ],
+)
+def test_edit_reparses_touched_statements(transpiler, offset, deleted, inserted, parsed):
+    document = Document(transpiler, SOURCE)
+    assert document.edit(offset, deleted, inserted) == parsed
+    assert ast.dump(document.tree) == expected(transpiler, document.source)
+    assert [(statement.start, statement.end) for statement in document.statements] == [
+        (statement.start, statement.end) for statement in Document(transpiler, document.source).statements
+    ]
+
+
+def test_edit_after_error_parses_everything(transpiler):
+    document = Document(transpiler, SOURCE)
+    with pytest.raises(ValueError):
+        document.edit(SOURCE.index(";"), 1, "")
+    assert document.statements == []
+    assert document.edit(SOURCE.index(";"), 0, ";") == 4
+    assert document.source == SOURCE
+    assert ast.dump(document.tree) == expected(transpiler, SOURCE)
@@ -1,5 +1,6 @@
 import pytest
-from lex import Lexer
+from lex import Lexer, Scanner, TokenStream, compileScanner, tokenClasses
+from lexgen import loadScanner
 from tokens import EndOfFile, Equal, Identifier, Integer, Plus, Questionmark,Semicolon # Space, NewLine
 
 # error- infinite loop
@@ -30,3 +31,162 @@ def test_lexer(src, expected):
     pytest.set_trace()
     for i, token in enumerate(list(lexer.tokens())):
         assert token == expected[i]
+
+
+@pytest.mark.parametrize(
+    "src,expected",
+    [
+        ("x==1", ["Identifier", "DoubleEqual", "Integer", "EndOfFile"]),
+        ("a<=b!=c", ["Identifier", "LTE", "Identifier", "NotEqual", "Identifier", "EndOfFile"]),
+        ("selectall select selector", ["SelectAll", "Space", "Select", "Space", "Identifier", "EndOfFile"]),
+        ("for forx run1 else", ["For", "Space", "Identifier", "Space", "Identifier", "Space", "Else", "EndOfFile"]),
+        ('set("x span", 7);', ["SetToken", "LeftBracket", "String", "Comma", "Space", "Integer", "RightBracket", "Semicolon", "EndOfFile"]),
+    ],
+)
+def test_longest_match(src, expected):
+    lexer = Lexer(src)
+    names = []
+    while not names or names[-1] != "EndOfFile":
+        names.append(str(lexer.advance()))
+    assert names == expected
+
+
+def test_keyword_must_be_identifier():
+    class Bad:
+        lexeme_pattern = r"1st"
+
+    with pytest.raises(ValueError):
+        Scanner((Identifier,), (Bad,))
+
+
+def test_token_stream_peek_and_rewind():
+    stream = TokenStream(Lexer("x = 1 + 2;"))
+    assert [str(stream.peek(k)) for k in range(3)] == ["Identifier", "Equal", "Integer"]
+
+    marker = stream.mark()
+    assert str(stream.consume()) == "Identifier"
+    assert str(stream.consume()) == "Equal"
+    stream.rewind(marker)
+    stream.release(marker)
+
+    consumed = []
+    while stream.peek() is not None:
+        consumed.append(str(stream.consume()))
+    assert consumed == ["Identifier", "Equal", "Integer", "Plus", "Integer", "Semicolon", "EndOfFile"]
+    assert stream.consume() is None
+
+
+def test_token_stream_drops_consumed_tokens():
+    stream = TokenStream(Lexer("x = 1;" * 100))
+    while stream.consume() is not None:
+        pass
+    assert len(stream.buffer) < 100
+
+
+def test_token_stream_advance():
+    stream = TokenStream(Lexer("x = 1;" * 100))
+    expected = TokenStream(Lexer("x = 1;" * 100))
+    while stream.peek() is not None:
+        expected.consume()
+        token, current = stream.advance(), expected.peek()
+        assert str(token) == str(current)
+        assert getattr(token, "start", None) == getattr(current, "start", None)
+    assert stream.advance() is None
+
+
+def test_lexer_from_file(tmp_path):
+    src = 'set("name", "blöck");\nfor(x=1:10) {y = 1;}\n'
+    path = tmp_path / "script.lsf"
+    path.write_bytes(src.encode())
+
+    with Lexer.fromFile(path) as mapped:
+        from_file = [(str(token), token.lexeme) for token in mapped.tokens()]
+    from_string = [(str(token), token.lexeme) for token in Lexer(src).tokens()]
+    assert from_file == from_string
+    assert ("String", '"blöck"') in from_file
+
+
+def test_tokenize_matches_tokens():
+    src = 'addrect;\nset("x span", 7);\nif (x >= 1) {select("a");}'
+    store = Lexer(src).tokenize()
+    tokens = list(Lexer(src).tokens())
+
+    assert len(store) == len(tokens)
+    assert [(str(token), token.lexeme) for token in store] == [(str(token), token.lexeme) for token in tokens]
+    assert store.kind(len(store) - 1) is EndOfFile
+    assert store.span(0) == (0, 7)
+
+
+def test_token_positions():
+    src = "x = 1;\n\n  y=2;\r\nz"
+    tokens = list(Lexer(src).tokens())
+    positions = [(str(token), token.line_no, token.column) for token in tokens]
+    assert positions[0] == ("Identifier", 1, 1)
+    assert positions[4] == ("Identifier", 3, 3)
+    assert positions[8] == ("Identifier", 4, 1)
+
+    store = Lexer(src).tokenize()
+    assert [store.position(i) for i in range(len(store))] == [(line, column) for _, line, column in positions]
+
+
+@pytest.mark.parametrize(
+    "src, offset, deleted, inserted",
+    [
+        ('set("x", 1);\nfor (i = 0; i < 3; i = i + 1) {run;}', 4, 3, '"name"'),
+        ("x = 1;\ny = 2;\nz = 3;", 7, 0, "for"),
+        ("x = 1;\ny = 2;\nz = 3;", 0, 1, "selectall"),
+        ('a = "\\"";\nb = 2;', 8, 0, '"'),
+        ('a = "x\\";\nb = 2;', 12, 0, '"'),
+        ("x = 1.5;", 5, 1, ""),
+        ("x = 1;", 6, 0, "\ny = 2;"),
+    ],
+)
+def test_edit_matches_tokenize(src, offset, deleted, inserted):
+    lexer = Lexer(src)
+    store = lexer.edit(lexer.tokenize(), offset, deleted, inserted)
+    edited = src[:offset] + inserted + src[offset + deleted :]
+    expected = Lexer(edited).tokenize()
+
+    assert lexer.source == edited
+    assert [(store.kind(i), store.span(i)) for i in range(len(store))] == [
+        (expected.kind(i), expected.span(i)) for i in range(len(expected))
+    ]
+
+
+def test_split_skips_newlines_in_strings():
+    src = 'addrect;\nset("name", "a\nb");\nset("x", "\\"\n");\nrun;\n'
+    boundaries = Lexer(src).split(1)
+    assert boundaries == [0, 9, 29, 46, 51]
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_tokenize_parallel_matches_tokenize(binary):
+    src = 'addrect;\nset("name", "a\nb");\nx = 1.5 and y;\nset("x", "\\"\n");\n' * 20
+    if binary:
+        src = src.encode()
+    store = Lexer(src).tokenizeParallel(workers=2, chunk_size=64)
+    expected = Lexer(src).tokenize()
+
+    assert [(store.kind(i), store.span(i)) for i in range(len(store))] == [
+        (expected.kind(i), expected.span(i)) for i in range(len(expected))
+    ]
+
+
+def test_generated_scanner_matches_scanner(tmp_path):
+    scanner = loadScanner(*tokenClasses(), tmp_path)
+    reference = compileScanner(*tokenClasses())
+    src = 'addrect;\nset("x \\" span", 7);\nif (x >= 1.5 and y != 2 | !z) {selectall; select("a");}\n~'
+    for position in range(len(src) + 1):
+        assert scanner.match(src, position) == reference.match(src, position)
+
+    store = Lexer(src, scanner=scanner).tokenize()
+    expected = Lexer(src).tokenize()
+    assert [(store.kind(i), store.span(i)) for i in range(len(store))] == [
+        (expected.kind(i), expected.span(i)) for i in range(len(expected))
+    ]
+    assert len(list(tmp_path.glob("lexer_*.py"))) == 1
+
+
+def test_generated_scanner_rejects_bytes(tmp_path):
+    with pytest.raises(ValueError):
+        Lexer(b"x = 1;", scanner=loadScanner(*tokenClasses(), tmp_path))
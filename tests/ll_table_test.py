@@ -3,8 +3,10 @@ from typing import TypeAlias
 from grammar import Grammar, Production
 from src.tokens import EndOfFile
 from symbol import Epsilon, NonTerminal
-from tokens import Integer, LeftBracket, Multiply, Plus, RightBracket, Semicolon, Token
-from lltable import LLTable
+from tokens import Integer, LeftBracket, Multiply, Plus, RightBracket, Semicolon, Space, Token
+from lltable import ACTION, LLTable
+import logging
+import pickle
 import pytest
 from copy import deepcopy
 from lumerical_grammar import lumerical_grammar
@@ -174,3 +176,160 @@ from lumerical_grammar import lumerical_grammar
 #     table.ComputeFolowSets()
 #     table.ComputeSelectSets()
 #     table.ComputeTable()
+
+
+def test_compiled_table_matches_table():
+    table = LLTable(lumerical_grammar)
+    table.ComputeTable()
+
+    for nonTerminal, row in table.table.items():
+        for terminal, production in row.items():
+            assert table.Predict(nonTerminal, type(terminal)()) is production
+            assert table.productions[table.PredictId(table.nonTerminalIds[nonTerminal], terminal)] is production
+
+
+def test_compiled_table_unknown_token():
+    table = LLTable(lumerical_grammar)
+    table.ComputeTable()
+
+    assert table.Predict(NonTerminal("root"), Space()) is None
+
+
+def test_cached_table_matches_computed(tmp_path, monkeypatch):
+    computed = LLTable.Cached(lumerical_grammar, tmp_path)
+    assert len(list(tmp_path.glob("lltable_*.pickle"))) == 1
+
+    def fail(self):
+        raise AssertionError("The sets should be loaded from the cache")
+
+    monkeypatch.setattr(LLTable, "ComputeFirstSets", fail)
+    loaded = LLTable.Cached(lumerical_grammar, tmp_path)
+
+    assert loaded.predictions == computed.predictions
+    assert loaded.expansions == computed.expansions
+    assert loaded.terminalIds == computed.terminalIds
+
+
+def test_productions_numbered_per_grammar():
+    def grammar() -> Grammar:
+        expression, term = NonTerminal("expression"), NonTerminal("term")
+        built = Grammar()
+        built.append(Production(expression, [term, Plus(), expression]))
+        built.append(Production(expression, [term]))
+        built.append(Production(term, [Integer()]))
+        return built
+
+    assert [production.number for production in grammar().productions] == [1, 2, 3]
+    assert [production.number for production in grammar().productions] == [1, 2, 3]
+    assert [production.number for production in lumerical_grammar.productions] == list(
+        range(1, len(lumerical_grammar.productions) + 1)
+    )
+
+
+def test_symbols_compare_by_interned_id():
+    assert NonTerminal("term") == NonTerminal("term")
+    assert hash(NonTerminal("term")) == hash(NonTerminal("term"))
+    assert NonTerminal("term") != NonTerminal("expression")
+    assert Integer() == Integer() and hash(Integer()) == hash(Integer()) == Integer.symbolId
+    assert Integer() != Plus()
+    assert Epsilon() == Epsilon()
+    assert NonTerminal("Integer") == Integer()
+    assert Integer() != None
+
+    loaded = pickle.loads(pickle.dumps({NonTerminal("term"): {Integer(), Plus()}}))
+    assert loaded == {NonTerminal("term"): {Integer(), Plus()}}
+    assert "symbolId" not in pickle.dumps(NonTerminal("term")).decode("latin-1")
+
+
+def test_compiled_actions_are_numbered():
+    table = LLTable(lumerical_grammar)
+    table.ComputeTable()
+
+    assert len({id(action) for action in table.actions}) == len(table.actions)
+    assert [call.__self__ for call in table.calls] == table.actions
+    for production, expansion in zip(table.productions[1:], table.expansions[1:]):
+        if isinstance(production.RHS, Epsilon):
+            continue
+        for symbol, (tag, value) in zip(reversed(production.RHS), expansion):
+            if tag == ACTION:
+                assert table.actions[value] is symbol
+
+
+def test_worklist_sets_are_closed():
+    table = LLTable(lumerical_grammar)
+    table.ComputeFirstSets()
+    table.ComputeFolowSets()
+    firstSets = deepcopy(table.firstSets)
+    followSets = deepcopy(table.followSets)
+
+    for production in lumerical_grammar.productions:
+        table.FirstClosure(production)
+        table.FollowClosure(production)
+
+    assert table.firstSets == firstSets
+    assert table.followSets == followSets
+
+
+def test_indirectly_nullable_nonterminals():
+    start, items, item, rest = NonTerminal("start"), NonTerminal("items"), NonTerminal("item"), NonTerminal("rest")
+    grammar = Grammar()
+    grammar.append(Production(start, [items, rest]))
+    grammar.append(Production(items, [item, items]))
+    grammar.append(Production(item, [Integer()]))
+    grammar.append(Production(items, Epsilon()))
+    grammar.append(Production(rest, [Semicolon()]))
+    grammar.append(Production(rest, Epsilon()))
+    digest = LLTable(grammar).Hash()
+
+    assert grammar.nullable_nonterminals == {start, items, rest}
+    assert not grammar.isNullable(item)
+    assert [production.nullable for production in grammar.productions] == [True, False, False, True, False, True]
+    assert LLTable(grammar).Hash() == digest
+
+    grammar.append(Production(item, [items]))
+    assert grammar.isNullable(item)
+
+
+def test_compressed_table_matches_select_sets():
+    table = LLTable(lumerical_grammar)
+    table.ComputeTable()
+
+    dense = [0] * (len(table.nonTerminals) * table.width)
+    for production in lumerical_grammar.productions:
+        row = table.nonTerminalIds[production.LHS]
+        for terminal in table.selectSets[production.number]:
+            dense[row * table.width + table.terminalIds[type(terminal)]] = production.number
+
+    assert table.predictions == dense
+    assert len(table.next) < len(dense)
+    assert all(table.Prediction(row, table.width - 1) == 0 for row in range(len(table.nonTerminals)))
+
+
+def test_conflicts_are_reported(tmp_path, caplog):
+    expression = NonTerminal("expression")
+    grammar = Grammar()
+    grammar.append(Production(expression, [Integer(), Plus(), Integer()]))
+    grammar.append(Production(expression, [Integer()]))
+    with caplog.at_level(logging.WARNING, logger="lltable"):
+        table = LLTable.Cached(grammar, tmp_path)
+    assert len(caplog.records) == 1
+
+    assert len(table.conflicts) == 1
+    conflict = table.conflicts[0]
+    assert conflict.nonTerminal == expression and conflict.terminal == Integer()
+    assert conflict.overwritten is grammar.productions[0]
+    assert conflict.chosen is grammar.productions[1]
+    assert table.Predict(expression, Integer()) is grammar.productions[1]
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="lltable"):
+        loaded = LLTable.Cached(grammar, tmp_path)
+    assert loaded.conflicts == table.conflicts
+    assert not caplog.records
+
+
+def test_lumerical_grammar_conflicts():
+    table = LLTable(lumerical_grammar)
+    table.ComputeTable()
+
+    assert [(str(conflict.nonTerminal), conflict.terminal) for conflict in table.conflicts] == [("body", EndOfFile())]
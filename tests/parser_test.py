@@ -1,8 +1,12 @@
 import pytest
+from cache import cacheDirectory
 from lex import Lexer
 from parse import Parser
 from lumerical_grammar import lumerical_grammar
 import ast
+import logging
+import logging.handlers
+from tracing import TRACE, RingBufferHandler, enableTracing
 
 
 @pytest.mark.parametrize(
@@ -71,3 +75,70 @@ def test_for_statements(input, output):
 
     print(ast.unparse(tree))
     assert ast.unparse(tree) == output
+
+
+def test_trace_dumped_on_failure():
+    target = logging.handlers.BufferingHandler(100000)
+    handler = RingBufferHandler(50, target=target)
+    root = logging.getLogger()
+    level = root.level
+    enableTracing(handler)
+    try:
+        parser = Parser(lumerical_grammar, Lexer("y = (1 + ;"))
+        assert target.buffer == []
+        with pytest.raises(ValueError):
+            parser.parse()
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(level)
+
+    assert len(target.buffer) == 50
+    assert target.buffer[-1].levelno == logging.ERROR
+    assert any(record.levelno == TRACE for record in target.buffer)
+
+
+@pytest.mark.parametrize(
+    "input",
+    [
+        "x = (1 + 2) * 3 - y / 4;",
+        "if (x >= 1 and y != 2) {z = 1;} else {z = 2;}",
+        "for(x=1:10) {for(z=2:5) {y=1;}}",
+        "y = (1 + ;",
+    ],
+)
+def test_generated_parser_matches_table(input):
+    def run(generated):
+        parser = Parser(lumerical_grammar, Lexer(input), generated=generated)
+        try:
+            parser.parse()
+        except ValueError as error:
+            return str(error)
+        return ast.dump(parser.valueStack.get()), len(parser.tokenStack)
+
+    assert run(True) == run(False)
+    assert list(cacheDirectory().glob("rdparser_*.py"))
+
+
+def test_recovery_collects_all_errors():
+    source = "x = (1 + ;\ny = 2;\nif (x > 1 {y = 1;}\nz = * 3;\n"
+    parser = Parser(lumerical_grammar, Lexer(source), recover=True)
+    parser.parse()
+    assert [(diagnostic.line, diagnostic.column) for diagnostic in parser.diagnostics] == [(1, 10), (3, 11), (4, 5)]
+
+    with pytest.raises(ValueError) as error:
+        Parser(lumerical_grammar, Lexer(source)).parse()
+    assert str(error.value) == parser.diagnostics[0].message
+
+
+@pytest.mark.parametrize("input", ["x = 1;", "x = @;", "@", "if (x) {"])
+def test_recovery_matches_parse(input):
+    parser = Parser(lumerical_grammar, Lexer(input), recover=True)
+    parser.parse()
+    try:
+        expected = Parser(lumerical_grammar, Lexer(input))
+        expected.parse()
+    except ValueError as error:
+        assert parser.diagnostics[0].message == str(error)
+    else:
+        assert parser.diagnostics == []
+        assert ast.dump(parser.valueStack.get()) == ast.dump(expected.valueStack.get())
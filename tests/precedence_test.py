@@ -0,0 +1,83 @@
+import ast
+import pytest
+from lex import Lexer
+from lltable import LLTable
+from lumerical_grammar import lumerical_grammar
+from parse import Parser
+from precedence import MAX_DEPTH, OperatorTable
+from tokens import And, Divide, Minus, Not, Or, Plus
+
+
+@pytest.fixture(scope="module")
+def table() -> LLTable:
+    return LLTable.Cached(lumerical_grammar)
+
+
+def test_operator_table_levels(table):
+    operators = OperatorTable.fromTable(table)
+    assert operators is OperatorTable.fromTable(table)
+    assert operators.binary[Plus][0] == operators.binary[Minus][0] < operators.binary[Divide][0]
+    level, operand, _ = operators.binary[And]
+    assert (level, operand) == (0, operators.binary[Or][0] + 1)
+    assert set(operators.prefixes) == {Minus, Not}
+
+
+@pytest.mark.parametrize(
+    "input",
+    [
+        "x = 2;",
+        'set("z", 2 + 2);',
+        "x = (a + 2.5) * b / 3 - c * (d - 1) + -e;",
+        "x = a < b <= c == d != e;",
+        "x = (a < b) < c;",
+        "x = - - !a * 2;",
+        "x = a or b and c or d;",
+        "if (x >= 1 and y != 2) {z = 1;} else {z = 2;}",
+        "for(x=1:2:10) {y = x * x;}",
+        "x = a and b or c;",
+        "x = (1 + ;",
+        "x = 1 2;",
+        "x = (1 + 2;",
+        "x = 1 +",
+    ],
+)
+def test_expressions_match_table(table, input):
+    def run(precedence, generated=False, recover=False):
+        parser = Parser(
+            lumerical_grammar, Lexer(input), generated=generated, recover=recover, table=table, precedence=precedence
+        )
+        try:
+            parser.parse()
+        except ValueError as error:
+            return str(error)
+        if recover:
+            return parser.diagnostics
+        return ast.dump(parser.valueStack.get()), [type(token) for token in parser.tokenStack]
+
+    expected = run(False)
+    assert run(True) == expected
+    assert run(True, generated=True) == expected
+    assert run(True, recover=True) == run(False, recover=True)
+
+
+def test_expression_parser_is_used(table):
+    parser = Parser(lumerical_grammar, Lexer("x = (a + 1) * -b;\ny = a < b;\nz = (1 + ;"), table=table, recover=True)
+    results = []
+    parse = parser.expressions.parse
+    parser.expressions.parse = lambda token: results.append(parse(token)) or results[-1]
+    parser.parse()
+    assert None not in results[:2]
+    assert set(results[2:]) == {None}
+    assert parser.tokens.marks == 0
+
+
+@pytest.mark.parametrize("depth", [MAX_DEPTH, 1000, 3000])
+def test_deep_nesting_is_left_to_the_table(table, depth):
+    input = "x = " + "(" * depth + "1" + ")" * depth + ";"
+
+    def run(precedence):
+        parser = Parser(lumerical_grammar, Lexer(input), table=table, precedence=precedence)
+        parser.parse()
+        return ast.dump(parser.valueStack.get())
+
+    assert run(True) == run(False)
@@ -0,0 +1,42 @@
+import ast
+import pytest
+from actions import BinaryOperation, StoreLiteral
+from profiling import ActionProfile
+from transpiler import Transpiler
+
+
+@pytest.mark.parametrize("generated", [False, True])
+@pytest.mark.parametrize("precedence", [False, True])
+def test_profile_counts_action_calls(generated, precedence):
+    profile = ActionProfile()
+    transpiler = Transpiler(generated=generated, profile=profile)
+    parser = transpiler.parser("x = 1 + 2;\ny = 3 * 4;")
+    if not precedence:
+        parser.expressions = None
+    parser.parse()
+
+    counts = {}
+    for key, count in profile.counts.items():
+        action = profile.actions[key]
+        name = type(action).__name__
+        if isinstance(action, BinaryOperation):
+            name += type(action.op).__name__
+        if isinstance(action, StoreLiteral):
+            name += action.type.__name__
+        counts[name] = counts.get(name, 0) + count
+    assert counts["StoreLiteralint"] == 4
+    assert counts["BinaryOperationAdd"] == counts["BinaryOperationMult"] == 1
+    assert counts["BinaryOperationSub"] == 0
+    assert all(seconds >= 0 for seconds in profile.seconds.values())
+    assert ast.unparse(ast.fix_missing_locations(parser.valueStack.get())) == Transpiler().transpile(
+        "x = 1 + 2;\ny = 3 * 4;"
+    )
+
+
+def test_profile_report_lists_called_actions():
+    profile = ActionProfile()
+    Transpiler(profile=profile).transpile("x = 1;")
+    lines = profile.report().splitlines()
+    assert lines[0].split() == ["total", "ms", "calls", "us/call", "action"]
+    assert any("StoreLiteral" in line for line in lines[1:])
+    assert not any("BinaryOperation" in line for line in lines[1:])
@@ -0,0 +1,23 @@
+import pytest
+from stack import Stack
+
+
+def test_stack_pop_n_and_peek():
+    stack = Stack()
+    for value in range(5):
+        stack.push(value)
+
+    assert stack.peek() == 4
+    assert stack.peek(1) == 3
+    assert stack.pop_n(3) == [2, 3, 4]
+    assert stack.pop_n(0) == []
+    assert stack.pop() == 1
+    assert stack.get() == 0
+    assert stack.empty()
+
+
+def test_stack_pop_n_too_many():
+    stack = Stack([1])
+    with pytest.raises(IndexError):
+        stack.pop_n(2)
+    assert stack == [1]
@@ -0,0 +1,72 @@
+import ast
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from lex import Lexer
+from lltable import LLTable
+from parse import Parser
+from lumerical_grammar import lumerical_grammar
+from transpiler import Transpiler
+
+SOURCES = [
+    "x = 1;",
+    "x = (1 + 2) * 3 - y / 4;\ny = x >= 1 and y != 2;",
+    'addfdtd;\naddrect;\nset("name", "block");\nset("x", 5);',
+]
+
+
+@pytest.mark.parametrize("generated", [False, True])
+def test_transpile_matches_parser(generated):
+    transpiler = Transpiler(generated=generated)
+    for source in SOURCES:
+        parser = Parser(lumerical_grammar, Lexer(source))
+        parser.parse()
+        expected = ast.unparse(ast.fix_missing_locations(parser.valueStack.get()))
+        assert transpiler.transpile(source) == expected
+        assert ast.unparse(transpiler.transpile(source, unparse=False)) == expected
+
+
+@pytest.mark.parametrize("generated", [False, True])
+def test_concurrent_transpiles_match_sequential(generated):
+    transpiler = Transpiler(generated=generated)
+    sources = [source.replace("1", str(number)) for number in range(50) for source in SOURCES]
+    expected = [transpiler.transpile(source) for source in sources]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(transpiler.transpile, sources)) == expected
+        assert list(executor.map(Transpiler(generated=generated).transpile, sources)) == expected
+
+
+def test_transpiler_builds_table_once(monkeypatch):
+    transpiler = Transpiler()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("LL table loaded again")
+
+    monkeypatch.setattr(LLTable, "Cached", fail)
+    with pytest.raises(ValueError):
+        transpiler.transpile("x = (1 + ;")
+    assert transpiler.transpile("x = 1;") == transpiler.transpile("x = 1;")
+
+
+def test_check_collects_diagnostics():
+    transpiler = Transpiler()
+    assert transpiler.check("x = 1;") == []
+    assert [diagnostic.line for diagnostic in transpiler.check("x = (1 + ;\ny = 2;\nz = * 3;")] == [1, 3]
+
+
+@pytest.mark.parametrize("generated", [False, True])
+def test_stream_matches_transpile(generated):
+    transpiler = Transpiler(generated=generated)
+    for source in SOURCES:
+        chunks = []
+        emitted = transpiler.stream(source, chunks.append)
+        assert emitted == len(chunks)
+        assert "".join(chunks) == transpiler.transpile(source) + "\n"
+
+
+def test_stream_keeps_no_statements():
+    chunks = []
+    parser = Transpiler().parser("x = 1;\ny = 2;\n" * 50, sink=chunks.append)
+    parser.parse()
+    assert len(chunks) == 3 + 100
+    assert parser.valueStack.get().body == []
+    assert len(parser.tokenStack) <= 1